@@ -0,0 +1,121 @@
+"""Encode cost of the recording capture presets.
+
+Encodes the same source with every preset in CAPTURE_PRESETS and reports the
+ffmpeg CPU time per minute of recording and the resulting bitrate.
+
+Sources:
+  lavfi    synthetic phone-sized UI: static background with a small element
+           that changes once per second (default, needs no display)
+  x11grab  the real capture backend; run under Xvfb, e.g.
+           xvfb-run -s "-screen 0 1280x1024x24" python -m benchmarks.capture --source x11grab
+
+Usage:
+  python -m benchmarks.capture --duration 30
+  python -m benchmarks.capture --preset standard --preset still --json capture.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+from space_watcher.domain.errors import MissingDependency
+from space_watcher.domain.models import WindowRect
+from space_watcher.infrastructure.capture import CAPTURE_PRESETS, CapturePreset, X11Grab
+from space_watcher.infrastructure.deps import default_registry
+
+RECT = WindowRect(0, 0, 360, 780)
+
+
+@dataclass
+class Result:
+    preset: str
+    source: str
+    duration: float
+    cpu_seconds: float
+    cpu_seconds_per_minute: float
+    cpu_percent: float
+    wall_seconds: float
+    bytes: int
+    kbps: float
+
+
+def _source_args(source: str, preset: CapturePreset, duration: float) -> list[str]:
+    if source == "x11grab":
+        return X11Grab().input_args(RECT, preset.fps) + ["-t", str(duration)]
+    graph = (
+        f"color=c=0x0f1115:s={RECT.width}x{RECT.height}:r={preset.fps}:d={duration},"
+        "drawbox=x=24:y=120:w=312:h=48:color=0x1c2433:t=fill,"
+        "drawbox=x=40:y=600:w=64:h=64:color=white:t=fill:enable='lt(mod(t,2),1)'"
+    )
+    return ["-f", "lavfi", "-i", graph]
+
+
+def run_preset(ffmpeg: str, preset: CapturePreset, source: str, duration: float, out_dir: str) -> Result:
+    import resource  # POSIX only; main() refuses Windows first.
+
+    out = os.path.join(out_dir, f"{preset.name}.mp4")
+    cmd = [ffmpeg, "-hide_banner", "-nostdin", "-v", "error", "-y"]
+    cmd += _source_args(source, preset, duration)
+    cmd += preset.video_args() + ["-an", out]
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    wall = time.perf_counter() - t0
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    size = os.path.getsize(out)
+    return Result(
+        preset=preset.name,
+        source=source,
+        duration=duration,
+        cpu_seconds=cpu,
+        cpu_seconds_per_minute=cpu * 60 / duration,
+        cpu_percent=100 * cpu / duration,
+        wall_seconds=wall,
+        bytes=size,
+        kbps=size * 8 / duration / 1000,
+    )
+
+
+def main(argv=None) -> int:
+    if os.name == "nt":
+        print("Run the capture benchmark on Linux/macOS (it reads child rusage).")
+        return 2
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.capture")
+    parser.add_argument("--preset", action="append", choices=sorted(CAPTURE_PRESETS))
+    parser.add_argument("--source", choices=["lavfi", "x11grab"], default="lavfi")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--json", help="Also write the results here.")
+    args = parser.parse_args(argv)
+
+    if args.source == "x11grab" and not os.environ.get("DISPLAY"):
+        print("x11grab needs DISPLAY; run under xvfb-run.")
+        return 2
+    try:
+        ffmpeg = default_registry().require("ffmpeg")
+    except MissingDependency as e:
+        print(e)
+        return 2
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="space_watcher_capture_") as tmp:
+        for name in args.preset or list(CAPTURE_PRESETS):
+            r = run_preset(ffmpeg, CAPTURE_PRESETS[name], args.source, args.duration, tmp)
+            results.append(r)
+            print(
+                f"{name:10s} cpu {r.cpu_seconds_per_minute:6.2f} s/min ({r.cpu_percent:5.1f}% of a core)  "
+                f"{r.kbps:7.1f} kbit/s"
+            )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
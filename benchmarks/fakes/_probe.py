@@ -0,0 +1,26 @@
+import sys
+
+# Replies to the version/capability probes of DependencyRegistry so the
+# fakes pass the same checks as the real binaries.
+REPLIES = {
+    "yt-dlp": {"--version": "2099.01.01 (fake)\n"},
+    "mpv": {
+        "--version": "mpv 0.0.0-fake\n",
+        "--ao=help": "Available audio outputs:\n  null             Null audio output\n",
+    },
+    "ffmpeg": {
+        "-version": "ffmpeg version 0.0-fake\n",
+        "-demuxers": "File formats:\n D. = Demuxing supported\n --\n D  aac             raw ADTS AAC\n"
+        " D  mpegts          MPEG-TS (MPEG-2 Transport Stream)\n",
+        "-devices": "Devices:\n D. = Demuxing supported\n --\n",
+    },
+}
+
+
+def answer(name: str, argv: list[str]):
+    for arg in argv:
+        reply = REPLIES[name].get(arg)
+        if reply is not None:
+            sys.stdout.write(reply)
+            return 0
+    return None
@@ -0,0 +1,48 @@
+import json
+import os
+import signal
+import sys
+import time
+
+from _ts import PACKET, SYNC, read_stamp
+
+
+def run(name: str) -> int:
+    # Consumes stdin like mpv/ffmpeg would, optionally at a limited rate, and
+    # writes byte counts and probe latencies to FAKE_SINK_STATS_DIR on exit.
+    rate = int(os.environ.get("FAKE_SINK_RATE", "0"))
+    stats_dir = os.environ.get("FAKE_SINK_STATS_DIR")
+    stats = {"name": name, "pid": os.getpid(), "bytes": 0, "latencies_ns": [], "started": time.time()}
+
+    def finish(*_):
+        stats["ended"] = time.time()
+        if stats_dir:
+            path = os.path.join(stats_dir, f"{name}-{os.getpid()}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(stats, f)
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, finish)
+    inp = sys.stdin.buffer
+    pending = b""
+    start = time.monotonic()
+    while True:
+        data = inp.read1(65536) if hasattr(inp, "read1") else inp.read(65536)
+        if not data:
+            break
+        now = time.monotonic_ns()
+        stats["bytes"] += len(data)
+        pending += data
+        usable = len(pending) - len(pending) % PACKET
+        for off in range(0, usable, PACKET):
+            if pending[off] == SYNC and pending[off + 1] & 0x1F == 0x1F:
+                stamp = read_stamp(pending[off:off + PACKET])
+                if stamp is not None:
+                    stats["latencies_ns"].append(now - stamp)
+        pending = pending[usable:]
+        if rate:
+            delay = start + stats["bytes"] / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    finish()
+    return 0
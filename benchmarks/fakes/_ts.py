@@ -0,0 +1,27 @@
+import struct
+import time
+
+PACKET = 188
+SYNC = 0x47
+# Null-PID packets are ignored by real demuxers, so they can carry probes.
+NULL_PID = 0x1FFF
+MARK = b"SWTS"
+
+
+def payload_packet(counter: int, pid: int = 0x100) -> bytes:
+    header = bytes([SYNC, 0x40 | (pid >> 8), pid & 0xFF, 0x10 | (counter & 0x0F)])
+    return header + bytes(PACKET - 4)
+
+
+def stamp_packet() -> bytes:
+    header = bytes([SYNC, NULL_PID >> 8, NULL_PID & 0xFF, 0x10])
+    body = MARK + struct.pack(">Q", time.monotonic_ns())
+    return header + body + bytes(PACKET - 4 - len(body))
+
+
+def read_stamp(packet: bytes):
+    if packet[0] != SYNC or ((packet[1] & 0x1F) << 8 | packet[2]) != NULL_PID:
+        return None
+    if packet[4:8] != MARK:
+        return None
+    return struct.unpack(">Q", packet[8:16])[0]
@@ -0,0 +1,217 @@
+"""Multi-session soak test against the fake binaries.
+
+Drives N concurrent sessions through StartSessionUseCase/StopSessionUseCase
+with scripted disconnects, mutes and stop/start cycles, samples the process
+tree (CPU, RSS, open FDs, threads, zombies) and reports leak slopes.
+
+Usage:
+  python -m benchmarks.soak --sessions 4 --duration 3600 --report soak.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from space_watcher.application.use_cases import StartSessionUseCase, StopSessionUseCase
+from space_watcher.domain.models import RunOptions, SpaceUrl, WindowRect
+from space_watcher.infrastructure.proc_stats import child_pids, process_sample
+from space_watcher.infrastructure.session_runtime import SessionOrchestrator
+
+from .stream import use_fakes
+
+# Per-hour growth that counts as a leak once the warm-up is over.
+LEAK_LIMITS = {
+    "rss_bytes": 16 * 1024 * 1024,
+    "fds": 4,
+    "threads": 2,
+    "processes": 1,
+    "zombies": 1,
+}
+UA = "soak"
+RECT = WindowRect(0, 0, 360, 780)
+
+
+def _slope_per_hour(points: list[tuple[float, float]]) -> float:
+    # Least-squares slope; robust enough for monotonic leaks.
+    n = len(points)
+    if n < 3:
+        return 0.0
+    mx = sum(t for t, _ in points) / n
+    my = sum(v for _, v in points) / n
+    den = sum((t - mx) ** 2 for t, _ in points)
+    if not den:
+        return 0.0
+    return sum((t - mx) * (v - my) for t, v in points) / den * 3600
+
+
+def sample_tree(root: int) -> dict:
+    total = {"cpu_seconds": 0.0, "rss_bytes": 0, "fds": 0, "threads": 0, "processes": 0, "zombies": 0}
+    for pid in [root] + child_pids(root):
+        st = process_sample(pid)
+        if not st:
+            continue
+        total["processes"] += 1
+        if st["state"] == "Z":
+            total["zombies"] += 1
+            continue
+        for key in ("cpu_seconds", "rss_bytes", "fds", "threads"):
+            total[key] += st[key]
+    total["py_threads"] = threading.active_count()
+    return total
+
+
+class SoakDriver:
+    def __init__(self, sessions: int, out_dir: str, *, record: bool, seed: int):
+        self.orch = SessionOrchestrator(out_dir)
+        self.start_uc = StartSessionUseCase(self.orch)
+        self.stop_uc = StopSessionUseCase(self.orch)
+        self.opts = RunOptions(RECT, UA, record, allow_cookies_fallback=False, ui=False)
+        self.rng = random.Random(seed)
+        self.runtimes = [None] * sessions
+        self.events: dict[str, int] = {"disconnect": 0, "mute": 0, "restart": 0}
+
+    def start_all(self):
+        for i in range(len(self.runtimes)):
+            self._start(i)
+
+    def stop_all(self):
+        for i, rt in enumerate(self.runtimes):
+            if rt:
+                self.stop_uc.execute(rt)
+                self.runtimes[i] = None
+
+    def _start(self, i: int):
+        space = SpaceUrl(f"https://x.com/i/spaces/soak{i}")
+        self.runtimes[i] = self.start_uc.execute(space, self.opts, None).runtime
+
+    def step(self):
+        i = self.rng.randrange(len(self.runtimes))
+        rt = self.runtimes[i]
+        if not rt:
+            return
+        roll = self.rng.random()
+        if roll < 0.5:
+            # Simulated upstream drop: the stream loop must reconnect.
+            yt = rt.audio.yt
+            if yt and yt.poll() is None:
+                yt.kill()
+            self.events["disconnect"] += 1
+        elif roll < 0.8:
+            self.orch.toggle_mute(rt)
+            self.events["mute"] += 1
+        else:
+            self.stop_uc.execute(rt)
+            self._start(i)
+            self.events["restart"] += 1
+
+
+def _mean(values: list[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def analyse(samples: list[dict], warmup: float) -> dict:
+    steady = [s for s in samples if s["t"] >= warmup] or samples
+    quarter = max(1, len(steady) // 4)
+    out = {}
+    for key, limit in LEAK_LIMITS.items():
+        values = [s[key] for s in steady]
+        slope = _slope_per_hour([(s["t"], s[key]) for s in steady])
+        # Session churn makes the raw series saw-toothed; a leak must also
+        # lift the last quarter's average above the first quarter's.
+        grew = _mean(values[-quarter:]) > _mean(values[:quarter])
+        out[key] = {
+            "first": values[0],
+            "last": values[-1],
+            "max": max(values),
+            "slope_per_hour": slope,
+            "leak": slope > limit and grew,
+        }
+    if len(steady) >= 2:
+        span = steady[-1]["t"] - steady[0]["t"]
+        cpu = steady[-1]["cpu_seconds"] - steady[0]["cpu_seconds"]
+        out["cpu_percent"] = 100.0 * cpu / span if span else 0.0
+    return out
+
+
+def main(argv=None) -> int:
+    if not sys.platform.startswith("linux"):
+        print("The soak harness samples /proc and needs Linux.")
+        return 2
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.soak")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=600.0, help="seconds")
+    parser.add_argument("--sample-interval", type=float, default=5.0)
+    parser.add_argument("--event-interval", type=float, default=2.0, help="mean seconds between scripted events")
+    parser.add_argument("--warmup", type=float, default=60.0)
+    parser.add_argument("--bitrate", default="64000")
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--report", default="soak_report.json")
+    args = parser.parse_args(argv)
+
+    use_fakes(os.environ)
+    os.environ["FAKE_YTDLP_BITRATE"] = args.bitrate
+    out_dir = tempfile.mkdtemp(prefix="space_watcher_soak_")
+    driver = SoakDriver(args.sessions, out_dir, record=args.record, seed=args.seed)
+
+    samples = []
+    root = os.getpid()
+    start = time.monotonic()
+    next_sample = start
+    next_event = start + driver.rng.expovariate(1.0 / args.event_interval)
+    driver.start_all()
+    try:
+        while True:
+            now = time.monotonic()
+            if now - start >= args.duration:
+                break
+            if now >= next_event:
+                driver.step()
+                next_event = now + driver.rng.expovariate(1.0 / args.event_interval)
+            if now >= next_sample:
+                s = sample_tree(root)
+                s["t"] = now - start
+                samples.append(s)
+                next_sample += args.sample_interval
+                print(
+                    f"t={s['t']:7.0f}s procs={s['processes']:3d} zombies={s['zombies']:2d} "
+                    f"rss={s['rss_bytes'] / 2**20:7.1f} MiB fds={s['fds']:4d} threads={s['threads']:3d}",
+                    flush=True,
+                )
+            time.sleep(max(0.05, min(next_event, next_sample) - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        driver.stop_all()
+        time.sleep(1.0)
+        after = sample_tree(root)
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    report = {
+        "sessions": args.sessions,
+        "duration": samples[-1]["t"] if samples else 0.0,
+        "events": driver.events,
+        "metrics": analyse(samples, args.warmup) if samples else {},
+        "after_stop": after,
+        "samples": samples,
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    leaks = [k for k, v in report["metrics"].items() if isinstance(v, dict) and v["leak"]]
+    if report["duration"] < 600:
+        print("Note: runs shorter than 10 minutes give unreliable slopes.")
+    leftovers = after["processes"] - 1
+    print(f"Events: {driver.events}")
+    print(f"Leaks: {', '.join(leaks) or 'none'}; processes left after stop: {leftovers}")
+    print(f"Report written to {args.report}")
+    return 1 if leaks or leftovers else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
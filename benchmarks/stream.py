@@ -0,0 +1,209 @@
+"""Micro-benchmarks for AudioStreamService._stream_loop using fake binaries.
+
+Usage:
+  python -m benchmarks.stream                    # run and compare to baseline
+  python -m benchmarks.stream --update-baseline  # store new baseline
+  python -m benchmarks.stream --scenario max --duration 10
+
+The fakes in benchmarks/fakes are selected through the regular
+SPACE_WATCHER_*_PATH overrides, so the real dependency lookup is exercised.
+
+Timings only compare on the same machine, so the baseline is local and not
+committed: the first run on a host records any scenario it does not have yet.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+from space_watcher.infrastructure.audio_stream import AudioStreamService
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FAKES = os.path.join(HERE, "fakes")
+BASELINE = os.path.join(HERE, "baseline.json")
+
+SCENARIOS = {
+    # Raw loop throughput: the source writes as fast as the pipes allow.
+    "max": {"FAKE_YTDLP_BITRATE": "0"},
+    "steady": {"FAKE_YTDLP_BITRATE": "128000", "FAKE_YTDLP_BURST": "0.05"},
+    "bursty": {"FAKE_YTDLP_BITRATE": "128000", "FAKE_YTDLP_BURST": "1.0"},
+    "flaky": {"FAKE_YTDLP_BITRATE": "128000", "FAKE_YTDLP_FAIL": "after:1.5"},
+    "slow_sink": {"FAKE_YTDLP_BITRATE": "0", "FAKE_SINK_RATE": "4000000"},
+}
+
+# Relative tolerance before a change counts as a regression; timing on
+# shared machines is noisy.
+TOLERANCE = 0.25
+
+
+@dataclass
+class Result:
+    scenario: str
+    duration: float
+    mpv_bytes: int
+    ffmpeg_bytes: int
+    throughput_bps: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    cpu_seconds: float
+    cpu_ms_per_mib: float
+    alloc_peak_kib: float
+    sink_cpu_seconds: float
+    yt_starts: int
+
+
+def use_fakes(env: dict) -> None:
+    for name in ("yt-dlp", "mpv", "ffmpeg"):
+        key = "SPACE_WATCHER_" + name.upper().replace("-", "_") + "_PATH"
+        env[key] = os.path.join(FAKES, name)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[idx]
+
+
+def run_scenario(name: str, duration: float) -> Result:
+    import resource  # POSIX only; main() refuses Windows first.
+
+    saved = dict(os.environ)
+    stats_dir = tempfile.mkdtemp(prefix="space_watcher_bench_")
+    os.environ.update(SCENARIOS[name])
+    os.environ["FAKE_SINK_STATS_DIR"] = stats_dir
+    use_fakes(os.environ)
+
+    starts = []
+    svc = AudioStreamService()
+    tracemalloc.start()
+    cpu0 = time.process_time()
+    child0 = resource.getrusage(resource.RUSAGE_CHILDREN)
+    try:
+        h = svc.start(
+            url="https://x.com/i/spaces/bench",
+            record=True,
+            ffmpeg_cmd=["ffmpeg", "-i", "pipe:0", "bench.mp4"],
+            guest=True,
+            cookies=False,
+            log=lambda m: starts.append(m) if m.startswith("Starting audio") else None,
+        )
+        time.sleep(duration)
+        svc.stop(h)
+        h.thread.join(timeout=5)
+        for p in (h.mpv, h.ffmpeg, h.yt):
+            if p:
+                p.wait(timeout=5)
+    finally:
+        cpu = time.process_time() - cpu0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        os.environ.clear()
+        os.environ.update(saved)
+
+    child1 = resource.getrusage(resource.RUSAGE_CHILDREN)
+    sink_cpu = (child1.ru_utime - child0.ru_utime) + (child1.ru_stime - child0.ru_stime)
+
+    mpv_bytes = ffmpeg_bytes = 0
+    latencies = []
+    for path in glob.glob(os.path.join(stats_dir, "*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            st = json.load(f)
+        if st["name"] == "mpv":
+            mpv_bytes += st["bytes"]
+            latencies.extend(v / 1e6 for v in st["latencies_ns"])
+        else:
+            ffmpeg_bytes += st["bytes"]
+    shutil.rmtree(stats_dir, ignore_errors=True)
+
+    mib = max(mpv_bytes, 1) / (1024 * 1024)
+    return Result(
+        scenario=name,
+        duration=duration,
+        mpv_bytes=mpv_bytes,
+        ffmpeg_bytes=ffmpeg_bytes,
+        throughput_bps=mpv_bytes / duration,
+        latency_p50_ms=statistics.median(latencies) if latencies else 0.0,
+        latency_p95_ms=_percentile(latencies, 95),
+        cpu_seconds=cpu,
+        cpu_ms_per_mib=cpu * 1000 / mib,
+        alloc_peak_kib=peak / 1024,
+        sink_cpu_seconds=sink_cpu,
+        yt_starts=len(starts),
+    )
+
+
+def compare(result: Result, base: dict) -> list[str]:
+    problems = []
+    hi = 1 + TOLERANCE
+    lo = 1 - TOLERANCE
+    if result.throughput_bps < base["throughput_bps"] * lo:
+        problems.append(f"throughput {result.throughput_bps:.0f} B/s < baseline {base['throughput_bps']:.0f}")
+    # Sub-millisecond latencies are noise; allow 2 ms of absolute slack.
+    if result.latency_p95_ms > base["latency_p95_ms"] * hi + 2.0:
+        problems.append(f"p95 latency {result.latency_p95_ms:.2f} ms > baseline {base['latency_p95_ms']:.2f}")
+    if result.cpu_ms_per_mib > base["cpu_ms_per_mib"] * hi + 1.0:
+        problems.append(f"CPU {result.cpu_ms_per_mib:.1f} ms/MiB > baseline {base['cpu_ms_per_mib']:.1f}")
+    if result.alloc_peak_kib > base["alloc_peak_kib"] * hi + 64:
+        problems.append(f"alloc peak {result.alloc_peak_kib:.0f} KiB > baseline {base['alloc_peak_kib']:.0f}")
+    return problems
+
+
+def main(argv=None) -> int:
+    if os.name == "nt":
+        print("The fake binaries are POSIX scripts; run the benchmarks on Linux/macOS.")
+        return 2
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stream")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    failed = False
+    results = {}
+    missing = {}
+    for name in args.scenario or list(SCENARIOS):
+        r = run_scenario(name, args.duration)
+        results[name] = asdict(r)
+        print(
+            f"{name:10s} {r.throughput_bps / 1024:10.1f} KiB/s  p50 {r.latency_p50_ms:7.2f} ms  "
+            f"p95 {r.latency_p95_ms:7.2f} ms  cpu {r.cpu_ms_per_mib:7.1f} ms/MiB  "
+            f"alloc {r.alloc_peak_kib:7.0f} KiB  starts {r.yt_starts}"
+        )
+        if args.update_baseline:
+            continue
+        if name not in baseline:
+            missing[name] = results[name]
+            continue
+        for p in compare(r, baseline[name]):
+            failed = True
+            print(f"  REGRESSION: {p}")
+
+    if args.update_baseline or missing:
+        baseline.update(results if args.update_baseline else missing)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        if missing and not args.update_baseline:
+            print(f"No baseline yet for {', '.join(missing)}; recorded in {args.baseline}")
+        else:
+            print(f"Baseline written to {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,26 @@
-from .use_cases import StartSessionResult, StartSessionUseCase, StopSessionUseCase
+from .cluster import Coordinator, RecordingWorker
+from .use_cases import (
+    DownloadReplayResult,
+    DownloadReplayUseCase,
+    ResumeSessionsResult,
+    ResumeSessionsUseCase,
+    StartSessionResult,
+    StartSessionUseCase,
+    StopSessionUseCase,
+)
+from .watchlist import SchedulerConfig, WatchlistScheduler, load_watchlist
 
 __all__ = [
+    "Coordinator",
+    "DownloadReplayResult",
+    "DownloadReplayUseCase",
+    "RecordingWorker",
+    "ResumeSessionsResult",
+    "ResumeSessionsUseCase",
+    "SchedulerConfig",
     "StartSessionResult",
     "StartSessionUseCase",
     "StopSessionUseCase",
+    "WatchlistScheduler",
+    "load_watchlist",
 ]
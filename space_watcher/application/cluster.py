@@ -0,0 +1,423 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from ..domain.errors import DomainError
+from ..domain.models import RunOptions, SpaceUrl
+from ..infrastructure.error_log import log_error
+from ..infrastructure.proc_stats import disk_free_bytes, host_load
+from ..infrastructure.session_runtime import SessionRuntime
+from .use_cases import StartSessionUseCase, StopSessionUseCase
+
+HEARTBEAT_INTERVAL = 1.0
+WORKER_TIMEOUT = 3.0
+LEASE_TTL = 5.0
+MAX_ATTEMPTS = 5
+
+
+# Newline-delimited JSON over a TCP socket; sends may come from any thread.
+class _Conn:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.reader = sock.makefile("r", encoding="utf-8", newline="\n")
+        self._send_lock = threading.Lock()
+        self.closed = False
+
+    def send(self, msg: dict[str, Any]) -> bool:
+        data = (json.dumps(msg, separators=(",", ":")) + "\n").encode("utf-8")
+        try:
+            with self._send_lock:
+                self.sock.sendall(data)
+            return True
+        except OSError:
+            self.close()
+            return False
+
+    def recv(self) -> Optional[dict[str, Any]]:
+        try:
+            line = self.reader.readline()
+        except (OSError, ValueError):
+            line = ""
+        if not line:
+            self.close()
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return {}
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+@dataclass
+class WorkerInfo:
+    worker_id: str
+    conn: _Conn
+    capacity: dict[str, Any] = field(default_factory=dict)
+    last_seen: float = field(default_factory=time.monotonic)
+
+    def free_slots(self, assigned: int) -> int:
+        return int(self.capacity.get("max_sessions", 1)) - max(assigned, int(self.capacity.get("active", 0)))
+
+    def score(self, assigned: int) -> tuple:
+        load = self.capacity.get("load")
+        disk = self.capacity.get("disk_free") or 0
+        used = assigned / max(1, int(self.capacity.get("max_sessions", 1)))
+        return (used, load if load is not None else 0.0, -disk)
+
+
+@dataclass
+class Assignment:
+    space_id: str
+    url: str
+    worker_id: Optional[str] = None
+    lease: int = 0
+    expires: float = 0.0
+    attempts: int = 0
+
+
+class Coordinator:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        lease_ttl: float = LEASE_TTL,
+        worker_timeout: float = WORKER_TIMEOUT,
+        min_disk_free: int = 2 * 1024 ** 3,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self.lease_ttl = lease_ttl
+        self.worker_timeout = worker_timeout
+        self.min_disk_free = min_disk_free
+        self.log = log
+        self._workers: dict[str, WorkerInfo] = {}
+        self._spaces: dict[str, Assignment] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._next_lease = 0
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()[:2]
+
+    def start(self) -> "Coordinator":
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._monitor_loop, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._server.close()
+        with self._lock:
+            workers = list(self._workers.values())
+        for w in workers:
+            w.conn.close()
+
+    def submit(self, url: str) -> str:
+        space = SpaceUrl(url)
+        with self._lock:
+            if space.space_id not in self._spaces:
+                self._spaces[space.space_id] = Assignment(space.space_id, space.value)
+        self._assign_pending()
+        return space.space_id
+
+    def cancel(self, space_id: str) -> None:
+        with self._lock:
+            a = self._spaces.pop(space_id, None)
+            w = self._workers.get(a.worker_id) if a and a.worker_id else None
+        if w:
+            w.conn.send({"type": "revoke", "space": space_id})
+
+    def assignments(self) -> dict[str, Optional[str]]:
+        with self._lock:
+            return {k: a.worker_id for k, a in self._spaces.items()}
+
+    def workers(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {k: dict(w.capacity) for k, w in self._workers.items()}
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                sock, _addr = self._server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(_Conn(sock),), daemon=True).start()
+
+    def _serve(self, conn: _Conn):
+        worker_id = None
+        while not self._stop.is_set():
+            msg = conn.recv()
+            if msg is None:
+                break
+            if not isinstance(msg, dict):
+                conn.send({"type": "error", "message": "Expected a JSON object."})
+                continue
+            kind = msg.get("type")
+            if kind == "submit":
+                try:
+                    conn.send({"type": "submitted", "space": self.submit(msg.get("url", ""))})
+                except DomainError as e:
+                    conn.send({"type": "error", "message": str(e)})
+            elif kind == "hello":
+                if not msg.get("worker") or not isinstance(msg["worker"], str):
+                    conn.send({"type": "error", "message": "hello needs a worker id."})
+                    continue
+                worker_id = msg["worker"]
+                self._register(worker_id, conn, msg)
+            elif kind == "heartbeat" and worker_id:
+                self._heartbeat(worker_id, msg)
+                # The worker's proof that its leases are still ours to keep.
+                conn.send({"type": "ack"})
+            elif kind == "released" and worker_id:
+                self._released(worker_id, msg)
+        if worker_id:
+            self._drop_worker(worker_id, conn)
+
+    def _register(self, worker_id: str, conn: _Conn, msg: dict[str, Any]):
+        with self._lock:
+            old = self._workers.get(worker_id)
+            self._workers[worker_id] = WorkerInfo(worker_id, conn, msg.get("capacity", {}))
+        if old and old.conn is not conn:
+            old.conn.close()
+        if self.log:
+            self.log(f"Worker {worker_id} joined.")
+        self._heartbeat(worker_id, msg)
+
+    def _heartbeat(self, worker_id: str, msg: dict[str, Any]):
+        revoke = []
+        now = time.monotonic()
+        with self._lock:
+            w = self._workers.get(worker_id)
+            if not w:
+                return
+            w.last_seen = now
+            w.capacity = msg.get("capacity", w.capacity)
+            for space_id in msg.get("leases", []):
+                a = self._spaces.get(space_id)
+                if a and a.worker_id in (None, worker_id):
+                    # Adopt sessions a reconnecting worker kept running.
+                    a.worker_id = worker_id
+                    a.expires = now + self.lease_ttl
+                else:
+                    revoke.append(space_id)
+        for space_id in revoke:
+            w.conn.send({"type": "revoke", "space": space_id})
+        self._assign_pending()
+
+    def _released(self, worker_id: str, msg: dict[str, Any]):
+        with self._lock:
+            a = self._spaces.get(msg.get("space"))
+            if not a or a.worker_id != worker_id:
+                return
+            a.worker_id = None
+            give_up = a.attempts >= MAX_ATTEMPTS
+            if give_up:
+                del self._spaces[a.space_id]
+        if self.log:
+            self.log(f"Worker {worker_id} released {a.space_id}: {msg.get('reason', 'ended')}")
+            if give_up:
+                self.log(f"Giving up on {a.space_id} after {a.attempts} attempts.")
+        self._assign_pending()
+
+    def _drop_worker(self, worker_id: str, conn: _Conn):
+        with self._lock:
+            w = self._workers.get(worker_id)
+            if not w or w.conn is not conn:
+                return
+            del self._workers[worker_id]
+            for a in self._spaces.values():
+                if a.worker_id == worker_id:
+                    a.worker_id = None
+        conn.close()
+        if self.log:
+            self.log(f"Worker {worker_id} left; reassigning its Spaces.")
+        self._assign_pending()
+
+    def _monitor_loop(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL / 2):
+            now = time.monotonic()
+            with self._lock:
+                dead = [(w.worker_id, w.conn) for w in self._workers.values() if now - w.last_seen > self.worker_timeout]
+                for a in self._spaces.values():
+                    if a.worker_id and a.expires < now:
+                        a.worker_id = None
+            for worker_id, conn in dead:
+                self._drop_worker(worker_id, conn)
+            self._assign_pending()
+
+    def _assign_pending(self):
+        sends = []
+        with self._lock:
+            load: dict[str, int] = {}
+            for a in self._spaces.values():
+                if a.worker_id:
+                    load[a.worker_id] = load.get(a.worker_id, 0) + 1
+            for a in self._spaces.values():
+                if a.worker_id:
+                    continue
+                candidates = [
+                    w for w in self._workers.values()
+                    if w.free_slots(load.get(w.worker_id, 0)) > 0
+                    and (w.capacity.get("disk_free") is None or w.capacity["disk_free"] >= self.min_disk_free)
+                ]
+                if not candidates:
+                    break
+                w = min(candidates, key=lambda w: w.score(load.get(w.worker_id, 0)))
+                self._next_lease += 1
+                a.worker_id = w.worker_id
+                a.lease = self._next_lease
+                a.expires = time.monotonic() + self.lease_ttl
+                a.attempts += 1
+                load[w.worker_id] = load.get(w.worker_id, 0) + 1
+                sends.append((w, a.space_id, a.url, a.lease))
+        for w, space_id, url, lease in sends:
+            if self.log:
+                self.log(f"Assigning {space_id} to {w.worker_id} (lease {lease}).")
+            w.conn.send({"type": "assign", "space": space_id, "url": url, "lease": lease, "ttl": self.lease_ttl})
+
+
+class RecordingWorker:
+    def __init__(
+        self,
+        coordinator: tuple[str, int],
+        start_uc: StartSessionUseCase,
+        stop_uc: StopSessionUseCase,
+        opts: RunOptions,
+        *,
+        out_dir: str,
+        max_sessions: int = 2,
+        worker_id: Optional[str] = None,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self.coordinator = coordinator
+        self.start_uc = start_uc
+        self.stop_uc = stop_uc
+        self.opts = opts
+        self.out_dir = out_dir
+        self.max_sessions = max_sessions
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.log = log
+        self._sessions: dict[str, Optional[SessionRuntime]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._conn: Optional[_Conn] = None
+        self._last_contact = time.monotonic()
+
+    def start(self) -> "RecordingWorker":
+        threading.Thread(target=self._run, daemon=True).start()
+        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._conn:
+            self._conn.close()
+        self._stop_all()
+
+    def capacity(self) -> dict[str, Any]:
+        with self._lock:
+            active = len(self._sessions)
+        return {
+            "max_sessions": self.max_sessions,
+            "active": active,
+            "cpu_count": os.cpu_count() or 1,
+            "load": host_load(),
+            "disk_free": disk_free_bytes(self.out_dir),
+        }
+
+    def _leases(self) -> list[str]:
+        with self._lock:
+            return list(self._sessions)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sock = socket.create_connection(self.coordinator, timeout=5)
+            except OSError:
+                self._stop.wait(1.0)
+                continue
+            # The coordinator acks every heartbeat; silence this long means
+            # a dead or half-open connection.
+            sock.settimeout(WORKER_TIMEOUT)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = _Conn(sock)
+            self._conn = conn
+            conn.send({"type": "hello", "worker": self.worker_id, "capacity": self.capacity(), "leases": self._leases()})
+            while not self._stop.is_set():
+                msg = conn.recv()
+                if msg is None:
+                    break
+                self._last_contact = time.monotonic()
+                if msg.get("type") == "assign":
+                    self._start_session(msg["space"], msg["url"])
+                elif msg.get("type") == "revoke":
+                    self._stop_session(msg["space"])
+            self._conn = None
+            if self.log and not self._stop.is_set():
+                self.log("Lost coordinator; reconnecting...")
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            conn = self._conn
+            if conn and not conn.closed:
+                conn.send({"type": "heartbeat", "capacity": self.capacity(), "leases": self._leases()})
+            # _last_contact is the last message (normally an ack) from the
+            # coordinator, so this counts from when the link went quiet.
+            if time.monotonic() - self._last_contact > LEASE_TTL and self._leases():
+                # Our leases have expired and the Spaces are being reassigned;
+                # stop so the same Space is not recorded twice.
+                if self.log:
+                    self.log("Coordinator unreachable past lease TTL; stopping sessions.")
+                self._stop_all()
+
+    def _start_session(self, space_id: str, url: str):
+        with self._lock:
+            if space_id in self._sessions:
+                return
+            self._sessions[space_id] = None
+
+        def run():
+            try:
+                rt = self.start_uc.execute(SpaceUrl(url), self.opts, self.log).runtime
+            except Exception as e:
+                log_error(e, context="cluster_worker_start", extra={"space": space_id, "url": url})
+                with self._lock:
+                    self._sessions.pop(space_id, None)
+                if self._conn:
+                    self._conn.send({"type": "released", "space": space_id, "reason": str(e)})
+                return
+            with self._lock:
+                keep = space_id in self._sessions
+                if keep:
+                    self._sessions[space_id] = rt
+            if not keep:
+                self.stop_uc.execute(rt)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _stop_session(self, space_id: str):
+        with self._lock:
+            rt = self._sessions.pop(space_id, None)
+        if rt:
+            try:
+                self.stop_uc.execute(rt)
+            except Exception as e:
+                log_error(e, context="cluster_worker_stop", extra={"space": space_id})
+
+    def _stop_all(self):
+        for space_id in self._leases():
+            self._stop_session(space_id)
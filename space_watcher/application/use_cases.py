@@ -1,7 +1,10 @@
+import os
+import threading
 from dataclasses import dataclass
 from typing import Callable, Optional
 
 from ..domain.models import SpaceUrl, RunOptions
+from ..infrastructure.replay_download import ReplayDownloader, ReplayProgress, ReplayResult
 from ..infrastructure.session_runtime import SessionOrchestrator, SessionRuntime
 
 @dataclass
@@ -21,9 +24,46 @@ class StartSessionUseCase:
         rt = self.orchestrator.start(space, opts, on_log)
         return StartSessionResult(runtime=rt)
 
+@dataclass
+class ResumeSessionsResult:
+    runtimes: list[SessionRuntime]
+
+# Restarts the sessions whose snapshots survived a crash or reboot.
+class ResumeSessionsUseCase:
+    def __init__(self, orchestrator: SessionOrchestrator):
+        self.orchestrator = orchestrator
+
+    def execute(self, on_log: Optional[Callable[[str], None]] = None) -> ResumeSessionsResult:
+        return ResumeSessionsResult(runtimes=self.orchestrator.resume_all(on_log))
+
 class StopSessionUseCase:
     def __init__(self, orchestrator: SessionOrchestrator):
         self.orchestrator = orchestrator
 
     def execute(self, runtime: SessionRuntime):
         self.orchestrator.stop(runtime)
+
+@dataclass
+class DownloadReplayResult:
+    replay: ReplayResult
+
+# Ended Spaces: fetch the replay's fragments directly, without a player.
+# The output name only depends on the Space, so a rerun resumes.
+class DownloadReplayUseCase:
+    def __init__(self, downloader: ReplayDownloader, out_dir: str):
+        self.downloader = downloader
+        self.out_dir = out_dir
+
+    def execute(
+        self,
+        space: SpaceUrl,
+        on_log: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[ReplayProgress], None]] = None,
+        stop: Optional[threading.Event] = None,
+        cookies: bool = False,
+    ) -> DownloadReplayResult:
+        os.makedirs(self.out_dir, exist_ok=True)
+        m3u8 = self.downloader.resolve(space.value, cookies=cookies, log=on_log)
+        out_path = os.path.join(self.out_dir, f"space_{space.space_id}.ts")
+        replay = self.downloader.download(m3u8, out_path, stop=stop, progress=on_progress, log=on_log)
+        return DownloadReplayResult(replay=replay)
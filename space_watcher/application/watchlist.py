@@ -0,0 +1,189 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from ..domain.errors import DomainError
+from ..domain.models import RunOptions, SpaceUrl
+from ..infrastructure.error_log import log_error
+from ..infrastructure.session_runtime import SessionRuntime
+from .use_cases import StartSessionUseCase, StopSessionUseCase
+
+
+def load_watchlist(path: str) -> list[str]:
+    keys = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line and line not in keys:
+                keys.append(line)
+    return keys
+
+
+@dataclass
+class WatchEntry:
+    key: str
+    interval: float
+    next_check: float = 0.0
+    runtime: Optional[SessionRuntime] = None
+    starting: bool = False
+    capped: bool = False
+    live_url: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    max_sessions: int = 4
+    batch_size: int = 20
+    min_interval: float = 5.0
+    max_interval: float = 30.0
+    backoff: float = 1.5
+    # Minimum spacing between two status requests, across all batches.
+    request_spacing: float = 1.0
+
+
+class WatchlistScheduler:
+    def __init__(
+        self,
+        start_uc: StartSessionUseCase,
+        stop_uc: StopSessionUseCase,
+        source,
+        opts: RunOptions,
+        config: SchedulerConfig = SchedulerConfig(),
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self.start_uc = start_uc
+        self.stop_uc = stop_uc
+        self.source = source
+        self.opts = opts
+        self.config = config
+        self.log = log
+        self._entries: dict[str, WatchEntry] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_request = 0.0
+
+    def set_watchlist(self, keys: list[str]) -> None:
+        with self._lock:
+            for key in keys:
+                if key not in self._entries:
+                    self._entries[key] = WatchEntry(key, self.config.min_interval)
+            removed = [self._entries.pop(k) for k in list(self._entries) if k not in keys]
+        for entry in removed:
+            self._stop_session(entry)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            if entry.runtime:
+                self._stop_session(entry)
+
+    def active_sessions(self) -> int:
+        with self._lock:
+            return sum(1 for e in self._entries.values() if e.runtime or e.starting)
+
+    def sessions(self) -> dict[str, SessionRuntime]:
+        with self._lock:
+            return {k: e.runtime for k, e in self._entries.items() if e.runtime}
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due = [e for e in self._entries.values() if e.next_check <= now]
+                upcoming = [e.next_check for e in self._entries.values()]
+            due.sort(key=lambda e: e.next_check)
+            for i in range(0, len(due), self.config.batch_size):
+                if self._stop.is_set():
+                    return
+                self._check_batch(due[i:i + self.config.batch_size])
+            if not due:
+                wait = (min(upcoming) - now) if upcoming else 1.0
+                self._stop.wait(max(0.1, min(wait, 1.0)))
+
+    def _check_batch(self, batch: list[WatchEntry]):
+        wait = self._last_request + self.config.request_spacing - time.monotonic()
+        if wait > 0:
+            self._stop.wait(wait)
+        self._last_request = time.monotonic()
+        try:
+            statuses = self.source.check([e.key for e in batch])
+        except Exception as e:
+            log_error(e, context="watchlist_status", extra={"keys": [x.key for x in batch]})
+            for entry in batch:
+                self._reschedule(entry, live=False)
+            return
+        for entry in batch:
+            st = statuses.get(entry.key)
+            live = bool(st and st.live)
+            if live:
+                entry.live_url = st.url or entry.key
+                if not entry.runtime and not entry.starting:
+                    self._try_start(entry)
+            else:
+                entry.capped = False
+                if entry.runtime:
+                    if self.log:
+                        self.log(f"{entry.key} is no longer live; stopping.")
+                    self._stop_session(entry)
+            self._reschedule(entry, live=live)
+
+    def _reschedule(self, entry: WatchEntry, *, live: bool):
+        cfg = self.config
+        if live:
+            entry.interval = cfg.min_interval
+        else:
+            entry.interval = min(entry.interval * cfg.backoff, cfg.max_interval)
+        # Jitter keeps idle accounts from lining up into the same batch forever.
+        entry.next_check = time.monotonic() + entry.interval * random.uniform(0.9, 1.1)
+
+    def _try_start(self, entry: WatchEntry):
+        if self.active_sessions() >= self.config.max_sessions:
+            if self.log and not entry.capped:
+                self.log(f"{entry.key} is live but the session cap ({self.config.max_sessions}) is reached.")
+            entry.capped = True
+            return
+        entry.capped = False
+        try:
+            space = SpaceUrl(entry.live_url)
+        except DomainError as e:
+            log_error(e, context="watchlist_start", extra={"key": entry.key, "url": entry.live_url})
+            return
+        entry.starting = True
+        if self.log:
+            self.log(f"{entry.key} went live; starting session.")
+
+        def run():
+            try:
+                rt = self.start_uc.execute(space, self.opts, self.log).runtime
+                with self._lock:
+                    entry.runtime = rt
+                    orphaned = entry.key not in self._entries or self._stop.is_set()
+                if orphaned:
+                    self._stop_session(entry)
+            except Exception as e:
+                log_error(e, context="watchlist_start", extra={"key": entry.key, "url": entry.live_url})
+            finally:
+                entry.starting = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _stop_session(self, entry: WatchEntry):
+        rt, entry.runtime = entry.runtime, None
+        if not rt:
+            return
+        try:
+            self.stop_uc.execute(rt)
+        except Exception as e:
+            log_error(e, context="watchlist_stop", extra={"key": entry.key})
@@ -1,9 +1,10 @@
-from .errors import DomainError, InvalidSpaceUrl, MissingDependency, StartFailed
+from .errors import DomainError, InsufficientStorage, InvalidSpaceUrl, MissingDependency, StartFailed
 from .models import RunOptions, SpaceUrl, WindowRect
 from .validators import is_valid_space_url
 
 __all__ = [
     "DomainError",
+    "InsufficientStorage",
     "InvalidSpaceUrl",
     "MissingDependency",
     "RunOptions",
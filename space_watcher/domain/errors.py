@@ -9,3 +9,6 @@ class MissingDependency(DomainError):
 
 class StartFailed(DomainError):
     pass
+
+class InsufficientStorage(DomainError):
+    pass
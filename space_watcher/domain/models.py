@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
 from .validators import is_valid_space_url
 from .errors import InvalidSpaceUrl
 
@@ -19,6 +21,13 @@ class SpaceUrl:
             raise InvalidSpaceUrl("Invalid Space URL.")
         object.__setattr__(self, "value", v)
 
+    @property
+    def space_id(self) -> str:
+        parts = [p for p in urlparse(self.value).path.split("/") if p]
+        if len(parts) >= 3 and parts[-2] == "spaces":
+            return parts[-1]
+        return self.value
+
 @dataclass(frozen=True)
 class RunOptions:
     rect: WindowRect
@@ -26,3 +35,15 @@ class RunOptions:
     record: bool
     try_guest_first: bool = True
     allow_cookies_fallback: bool = True
+    block_resources: bool = True
+    persistent_profile: bool = False
+    ui: bool = True
+    relay_port: Optional[int] = None
+    relay_host: str = "127.0.0.1"
+    catch_up: bool = True
+    capture_backend: Optional[str] = None
+    capture_preset: str = "standard"
+    audio_output: Optional[str] = None
+    # Read the live playlist directly and snapshot progress, so a session
+    # interrupted by a crash or reboot can be resumed where it stopped.
+    resumable: bool = False
@@ -1,21 +1,58 @@
+from .audio_output import AudioOutputSelector
 from .audio_stream import AudioHandles, AudioStreamService
-from .browser_automation import BrowserAutomationService, BrowserRuntime
+from .browser_automation import BrowserAutomationService, BrowserPool, BrowserRuntime, ContextLease
+from .capture import CaptureBackend, CapturePreset
 from .edge_launcher import EdgeLaunchConfig, EdgeLauncher
 from .error_log import get_error_log_path, log_error
-from .recorder import RecordingPlan, RecorderService
+from .hls_live import LivePlaylistReader, LivePosition
+from .live_latency import CatchUpPolicy, LatencyEstimate, LatencyMonitor
+from .live_status import HttpStatusSource, LiveStatus, YtDlpStatusSource
+from .memory_governor import MemoryGovernor, MemoryHistory, MemorySample
+from .recorder import RecordingPlan, RecorderService, StreamRecording
+from .replay_download import ReplayDownloader, ReplayResult
+from .resource_policy import ResourcePolicy, ResourceStats
 from .session_runtime import SessionOrchestrator, SessionRuntime
+from .session_snapshot import SessionSnapshot, SnapshotStore
+from .storage import StorageManager, StoragePolicy
+from .stream_relay import StreamRelay
 
 __all__ = [
     "AudioHandles",
+    "AudioOutputSelector",
     "AudioStreamService",
     "BrowserAutomationService",
+    "BrowserPool",
     "BrowserRuntime",
+    "CaptureBackend",
+    "CapturePreset",
+    "CatchUpPolicy",
+    "ContextLease",
     "EdgeLaunchConfig",
     "EdgeLauncher",
+    "HttpStatusSource",
+    "LatencyEstimate",
+    "LatencyMonitor",
+    "LivePlaylistReader",
+    "LivePosition",
+    "LiveStatus",
+    "MemoryGovernor",
+    "MemoryHistory",
+    "MemorySample",
     "RecordingPlan",
     "RecorderService",
+    "ReplayDownloader",
+    "ReplayResult",
+    "ResourcePolicy",
+    "ResourceStats",
     "SessionOrchestrator",
     "SessionRuntime",
+    "SessionSnapshot",
+    "SnapshotStore",
+    "StorageManager",
+    "StoragePolicy",
+    "StreamRecording",
+    "StreamRelay",
+    "YtDlpStatusSource",
     "get_error_log_path",
     "log_error",
 ]
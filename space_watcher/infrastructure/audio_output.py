@@ -0,0 +1,150 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional
+
+from .deps import DependencyRegistry, cache_dir, default_registry
+
+# Never opens a device; for headless recorders.
+NULL_OUTPUT = "null"
+
+
+def candidate_outputs() -> list[str]:
+    if sys.platform == "win32":
+        return ["wasapi"]
+    if sys.platform == "darwin":
+        return ["coreaudio"]
+    return ["pipewire", "pulse", "alsa"]
+
+
+def _probe_cmd(mpv: str, ao: str, seconds: float) -> list[str]:
+    return [
+        mpv,
+        "--no-config",
+        "--no-video",
+        f"--ao={ao}",
+        "--volume=0",
+        "--term-status-msg=",
+        "--msg-level=all=error,cplayer=info",
+        f"av://lavfi:sine=frequency=440:duration={seconds}",
+    ]
+
+
+# Picks mpv's audio output once: each platform candidate that mpv was built
+# with is started on a short silent clip, and the one whose output came up
+# fastest wins. The choice is cached on disk per mpv binary.
+class AudioOutputSelector:
+    def __init__(
+        self,
+        deps: Optional[DependencyRegistry] = None,
+        cache_path: Optional[str] = None,
+        timeout: float = 5.0,
+    ):
+        self.deps = deps or default_registry()
+        self.cache_path = cache_path or os.path.join(cache_dir(), "audio_output.json")
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._choice: Optional[str] = None
+        self.startup_ms: dict[str, Optional[float]] = {}
+
+    def select(self, override: Optional[str] = None, log=None) -> str:
+        choice = override or os.environ.get("SPACE_WATCHER_AUDIO_OUTPUT")
+        if choice and choice != "auto":
+            return choice
+        device = os.environ.get("SPACE_WATCHER_AUDIO_DEVICE")
+        if device and "/" in device:
+            # "wasapi/{id}", "pulse/sink": the device names its output.
+            return device.split("/", 1)[0]
+        with self._lock:
+            if self._choice is None:
+                self._choice = self._resolve(log)
+            return self._choice
+
+    def _resolve(self, log) -> str:
+        info = self.deps.info("mpv", log=log)
+        if not info.ok:
+            return candidate_outputs()[0]
+        st = os.stat(info.path)
+        key = f"{info.path}:{st.st_size}:{st.st_mtime_ns}"
+        cached = self._load()
+        if cached.get("key") == key and cached.get("choice"):
+            self.startup_ms = cached.get("startup_ms") or {}
+            return cached["choice"]
+
+        built = info.capabilities.get("audio_outputs") or []
+        candidates = [ao for ao in candidate_outputs() if not built or ao in built]
+        self.startup_ms = {ao: self.probe(info.path, ao) for ao in candidates}
+        working = {ao: ms for ao, ms in self.startup_ms.items() if ms is not None}
+        choice = min(working, key=working.get) if working else NULL_OUTPUT
+        if log:
+            if working:
+                timings = ", ".join(f"{ao} {ms:.0f} ms" for ao, ms in sorted(working.items(), key=lambda x: x[1]))
+                log(f"Audio output: {choice} ({timings})")
+            else:
+                log("No working audio output found; playing to the null output.")
+        # A missing device may come back (headphones, RDP); probe again then.
+        if working:
+            self._save({"key": key, "choice": choice, "startup_ms": self.startup_ms, "probed_at": time.time()})
+        return choice
+
+    def probe(self, mpv: str, ao: str) -> Optional[float]:
+        # Milliseconds from spawn until mpv reports the output open and
+        # playing, or None if it could not open it.
+        tag = f"AO: [{ao}]"
+        started = time.perf_counter()
+        try:
+            proc = subprocess.Popen(
+                _probe_cmd(mpv, ao, 0.2),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+        except OSError:
+            return None
+        elapsed = None
+        timer = threading.Timer(self.timeout, proc.kill)
+        timer.start()
+        try:
+            for raw in proc.stdout:
+                if tag in raw.decode("utf-8", "replace"):
+                    elapsed = (time.perf_counter() - started) * 1000
+                    break
+            proc.kill()
+            proc.wait()
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+        return elapsed
+
+    def _load(self) -> dict:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data: dict) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass
+
+
+_default_selector: Optional[AudioOutputSelector] = None
+_default_lock = threading.Lock()
+
+
+def default_selector() -> AudioOutputSelector:
+    global _default_selector
+    with _default_lock:
+        if _default_selector is None:
+            _default_selector = AudioOutputSelector()
+        return _default_selector
@@ -3,10 +3,37 @@ import subprocess
 import sys
 import threading
 import time
+import uuid
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Callable, Optional
 from ..domain.errors import StartFailed
-from .deps import ensure_cmd
+from .audio_output import NULL_OUTPUT, AudioOutputSelector, default_selector
+from .deps import DependencyRegistry, default_registry
+from .error_log import log_error
+from .hls_live import LivePlaylistReader, LivePosition, PlaylistGone
+from .live_latency import CatchUpPolicy, IngestClock, LatencyMonitor, MpvIpc, mpv_ipc_path
+from .profiling import set_session, span
+from .recorder import StreamRecording
+from .stream_relay import StreamRelay
+
+def _reap(p: Optional[subprocess.Popen], timeout: float = 2.0) -> None:
+    # terminate() alone leaves a zombie and its pipe FDs behind.
+    if not p:
+        return
+    if p.poll() is None:
+        p.terminate()
+        try:
+            p.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            p.kill()
+            p.wait()
+    for stream in (p.stdin, p.stdout, p.stderr):
+        if stream:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
 
 @dataclass
 class AudioHandles:
@@ -17,66 +44,163 @@ class AudioHandles:
     thread: threading.Thread
     mpv_lock: threading.Lock = field(default_factory=threading.Lock)
     muted: bool = False
+    relay: Optional[StreamRelay] = None
+    clock: IngestClock = field(default_factory=IngestClock)
+    ipc_path: Optional[str] = None
+    latency: Optional[LatencyMonitor] = None
+    ao: Optional[str] = None
+    # Set for resumable sessions, which read the live playlist themselves.
+    position: Optional[LivePosition] = None
+    recording: Optional[StreamRecording] = None
+    # Guards recording and position only, never held across a pipe write,
+    # so snapshots do not wait on a stalled player.
+    record_lock: threading.Lock = field(default_factory=threading.Lock)
+    log: Optional[Callable[[str], None]] = None
+    record_failed: bool = False
+    # The live playlist reached #EXT-X-ENDLIST: nothing left to resume.
+    ended: bool = False
 
 class AudioStreamService:
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        deps: Optional[DependencyRegistry] = None,
+        outputs: Optional[AudioOutputSelector] = None,
+    ):
+        self.deps = deps or default_registry()
+        self.outputs = outputs or default_selector()
+        self._bins: dict[str, str] = {}
 
     def _ensure_deps(self, *, record: bool, log=None):
-        ensure_cmd("yt-dlp", log=log)
-        ensure_cmd("mpv", log=log)
-        if record:
-            ensure_cmd("ffmpeg", log=log)
+        for name in ("yt-dlp", "mpv", "ffmpeg") if record else ("yt-dlp", "mpv"):
+            self._bins[name] = self.deps.require(name, log=log)
 
-    def start(self, *, url, record, ffmpeg_cmd, guest, cookies, log):
-        self._ensure_deps(record=record, log=log)
-        mpv = self._start_mpv(muted=False)
+    def _bin(self, cmd: str) -> str:
+        return self._bins.get(cmd, cmd)
 
-        ff = self._start_ffmpeg(ffmpeg_cmd) if record else None
+    def start(
+        self,
+        *,
+        url,
+        record,
+        ffmpeg_cmd,
+        guest,
+        cookies,
+        log,
+        relay_port=None,
+        relay_host="127.0.0.1",
+        session_id=None,
+        catch_up=True,
+        audio_output=None,
+        position: Optional[LivePosition] = None,
+        recording: Optional[StreamRecording] = None,
+    ):
+        self._ensure_deps(record=record and recording is None, log=log)
+        ao = self.outputs.select(audio_output, log=log)
+        relay = None
+        if relay_port is not None:
+            try:
+                relay = StreamRelay(relay_host, relay_port, log=log).start()
+            except OSError as e:
+                raise StartFailed(f"Could not open relay on {relay_host}:{relay_port}: {e}") from e
+            if log:
+                log(f"Relay listening on {relay.url}")
+        ipc_path = mpv_ipc_path(session_id or uuid.uuid4().hex[:8])
+        mpv = None
+        try:
+            mpv = self._start_mpv(muted=False, ipc_path=ipc_path, ao=ao)
+            ff = self._start_ffmpeg(ffmpeg_cmd) if record and ffmpeg_cmd else None
+        except Exception:
+            _reap(mpv)
+            if relay:
+                relay.stop()
+            raise
 
         stop = threading.Event()
-        handles = AudioHandles(None, mpv, ff, stop, threading.Thread())
+        handles = AudioHandles(
+            None, mpv, ff, stop, threading.Thread(),
+            relay=relay, ipc_path=ipc_path, ao=ao, position=position, recording=recording, log=log,
+        )
+        handles.latency = LatencyMonitor(
+            handles.clock, MpvIpc(ipc_path), CatchUpPolicy(enabled=catch_up), log=log
+        )
         t = threading.Thread(
             target=self._stream_loop,
-            args=(handles, url, guest, cookies, log),
+            args=(handles, url, guest, cookies, log, session_id),
             daemon=True,
         )
         handles.thread = t
         t.start()
+        threading.Thread(target=handles.latency.run, args=(stop,), daemon=True).start()
 
         return handles
 
     def stop(self, h: AudioHandles):
         h.stop.set()
+        # Not under the lock first: the stream loop may hold it in a write
+        # to a sink that stopped reading, and only killing that sink frees it.
         for p in (h.ffmpeg, h.mpv, h.yt):
             if p and p.poll() is None:
                 p.terminate()
+        # Then once more under it, for a sink respawned meanwhile; with stop
+        # set, the loop respawns nothing after this.
+        with h.mpv_lock:
+            for p in (h.ffmpeg, h.mpv, h.yt):
+                if p and p.poll() is None:
+                    p.terminate()
+        with h.record_lock:
+            if h.recording:
+                h.recording.close()
+                h.recording = None
+        for p in (h.ffmpeg, h.mpv, h.yt):
+            _reap(p)
+        if h.relay:
+            h.relay.stop()
+        if h.ipc_path and os.name != "nt" and os.path.exists(h.ipc_path):
+            try:
+                os.remove(h.ipc_path)
+            except OSError:
+                pass
 
-    def _start_mpv(self, *, muted: bool):
+    def _start_mpv(self, *, muted: bool, ipc_path: Optional[str] = None, ao: Optional[str] = None):
         volume = "0" if muted else "100"
         cmd = [
-            "mpv",
+            self._bin("mpv"),
             "--no-video",
             "--no-config",
             "--mute=no",
             f"--volume={volume}",
-            "--ao=wasapi",
+            f"--ao={ao or 'wasapi'}",
             "--cache=yes",
             "--demuxer-max-bytes=512MiB",
             "-",
         ]
+        if ipc_path:
+            cmd.insert(-1, f"--input-ipc-server={ipc_path}")
         device = os.environ.get("SPACE_WATCHER_AUDIO_DEVICE")
-        if device:
+        if device and ao != NULL_OUTPUT:
             cmd.insert(-1, f"--audio-device={device}")
         return subprocess.Popen(cmd, stdin=subprocess.PIPE)
 
     def _start_ffmpeg(self, ffmpeg_cmd):
+        if ffmpeg_cmd and ffmpeg_cmd[0] == "ffmpeg":
+            ffmpeg_cmd = [self._bin("ffmpeg")] + list(ffmpeg_cmd[1:])
         return subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE)
 
     def _start_yt(self, url, cookies):
+        with span("audio.start_yt"):
+            return self._spawn_yt(url, cookies)
+
+    def _auth_args(self, cookies) -> list[str]:
         cookies_file = self._find_cookies_file() if cookies else None
-        base = [
-            "yt-dlp",
+        if cookies_file:
+            return ["--cookies", cookies_file]
+        return ["--cookies-from-browser", "edge"] if cookies else ["--no-cookies"]
+
+    def _spawn_yt(self, url, cookies):
+        yt = self._bin("yt-dlp")
+        cmd = [
+            yt,
+            *self._auth_args(cookies),
             "--retries", "infinite",
             "--fragment-retries", "infinite",
             "--retry-sleep", "1",
@@ -84,16 +208,76 @@ class AudioStreamService:
             "-o", "-",
             url,
         ]
-        cmd = (["yt-dlp", "--cookies-from-browser", "edge"] + base[1:]) if cookies else (["yt-dlp", "--no-cookies"] + base[1:])
-        if cookies_file:
-            cmd = ["yt-dlp", "--cookies", cookies_file] + base[1:]
         return subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE
         )
 
-    def _stream_loop(self, h: AudioHandles, url, guest, cookies, log):
+    def _resolve_playlist(self, url, cookies) -> Optional[str]:
+        cmd = [self._bin("yt-dlp"), *self._auth_args(cookies), "--get-url", "--no-warnings", url]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, timeout=60)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        urls = proc.stdout.decode("utf-8", "replace").split()
+        if proc.returncode != 0 or not urls or ".m3u8" not in urls[0]:
+            return None
+        return urls[0]
+
+    def _deliver(self, h: AudioHandles, data: bytes, sequence: Optional[int] = None) -> bool:
+        h.clock.feed(data)
+        with h.mpv_lock, span("stream.write"):
+            if h.stop.is_set():
+                return False
+            if h.mpv.poll() is not None:
+                _reap(h.mpv)
+                h.mpv = self._start_mpv(muted=h.muted, ipc_path=h.ipc_path, ao=h.ao)
+            if h.ffmpeg and h.ffmpeg.poll() is not None:
+                _reap(h.ffmpeg)
+                h.ffmpeg = self._start_ffmpeg(h.ffmpeg.args)
+            try:
+                if h.mpv.stdin:
+                    h.mpv.stdin.write(data)
+                    h.mpv.stdin.flush()
+                if h.ffmpeg and h.ffmpeg.stdin:
+                    h.ffmpeg.stdin.write(data)
+                    h.ffmpeg.stdin.flush()
+            except BrokenPipeError:
+                if h.mpv and h.mpv.poll() is None:
+                    h.mpv.terminate()
+                if h.ffmpeg and h.ffmpeg.poll() is None:
+                    h.ffmpeg.terminate()
+        # The recording and the position move together, so a snapshot never
+        # names a segment the file does not hold, or vice versa.
+        with h.record_lock:
+            if h.recording:
+                try:
+                    h.recording.write(data)
+                except OSError as e:
+                    # Disk full or gone: keep playing, stop recording. The
+                    # snapshot keeps the last offset that made it to disk.
+                    log_error(e, context="audio_recording", extra={"path": h.recording.path})
+                    if h.log:
+                        h.log(f"Recording stopped: {e}")
+                    h.recording.close()
+                    h.recording = None
+                    h.record_failed = True
+            # Once the file stops, so does the position a resume starts from.
+            if sequence is not None and not h.record_failed:
+                h.position.sequence = sequence
+        if h.relay:
+            h.relay.publish(data)
+        return True
+
+    def _stream_loop(self, h: AudioHandles, url, guest, cookies, log, session_id=None):
+        set_session(session_id)
+        try:
+            self._stream(h, url, guest, cookies, log)
+        finally:
+            set_session(None)
+
+    def _stream(self, h: AudioHandles, url, guest, cookies, log):
         modes = []
         if guest:
             modes.append(("guest", False))
@@ -102,6 +286,15 @@ class AudioStreamService:
         if not modes:
             modes.append(("guest", False))
 
+        if h.position is not None:
+            if h.position.auth == "cookies":
+                modes.sort(key=lambda m: not m[1])
+            if self._live_loop(h, url, modes, log):
+                return
+            if log:
+                log("Live playlist not readable directly; using yt-dlp. A resume will rejoin at the live edge.")
+            h.position.playlist_url = None
+
         mode_index = 0
         attempt = 0
         while not h.stop.is_set():
@@ -115,34 +308,22 @@ class AudioStreamService:
                     extra = " (edge cookies)"
                 log(f"Starting audio ({name}){extra} [attempt {attempt}]")
             h.yt = self._start_yt(url, use_cookies)
+            h.clock.reset()
             start_ts = time.time()
             got_data = False
 
             while not h.stop.is_set():
-                data = h.yt.stdout.read(65536)
+                # read1 returns whatever the pipe holds; read() would wait
+                # for a full 64 KiB, seconds of audio at Space bitrates.
+                with span("stream.read"):
+                    data = h.yt.stdout.read1(65536)
                 if not data:
                     break
                 got_data = True
-                with h.mpv_lock:
-                    if h.mpv.poll() is not None:
-                        h.mpv = self._start_mpv(muted=h.muted)
-                    if h.ffmpeg and h.ffmpeg.poll() is not None:
-                        h.ffmpeg = self._start_ffmpeg(h.ffmpeg.args)
-                    try:
-                        if h.mpv.stdin:
-                            h.mpv.stdin.write(data)
-                            h.mpv.stdin.flush()
-                        if h.ffmpeg and h.ffmpeg.stdin:
-                            h.ffmpeg.stdin.write(data)
-                            h.ffmpeg.stdin.flush()
-                    except BrokenPipeError:
-                        if h.mpv and h.mpv.poll() is None:
-                            h.mpv.terminate()
-                        if h.ffmpeg and h.ffmpeg.poll() is None:
-                            h.ffmpeg.terminate()
-
-            if h.yt and h.yt.poll() is None:
-                h.yt.terminate()
+                if not self._deliver(h, data):
+                    break
+
+            _reap(h.yt)
 
             if h.stop.is_set():
                 break
@@ -157,12 +338,62 @@ class AudioStreamService:
             # Always retry unless user stopped.
             time.sleep(2.0 if fast_fail else 1.0)
 
+    def _live_loop(self, h: AudioHandles, url, modes, log) -> bool:
+        # Reads the playlist without yt-dlp so every segment's media sequence
+        # is known. Returns False if the stream cannot be read this way.
+        pos = h.position
+        mode_index = 0
+        while not h.stop.is_set():
+            if not pos.playlist_url:
+                name, use_cookies = modes[min(mode_index, len(modes) - 1)]
+                if log:
+                    log(f"Resolving live playlist ({name})")
+                with span("audio.resolve"):
+                    pos.playlist_url = self._resolve_playlist(url, use_cookies)
+                if not pos.playlist_url:
+                    if mode_index < len(modes) - 1:
+                        mode_index += 1
+                    elif log:
+                        log("Audio not ready yet, retrying...")
+                    h.stop.wait(2.0)
+                    continue
+                pos.auth = name
+            reader = LivePlaylistReader(pos.playlist_url, after=pos.sequence, log=log)
+            h.clock.reset()
+            try:
+                for seq, data in reader.segments(h.stop):
+                    if not self._deliver(h, data, seq):
+                        break
+                else:
+                    if not h.stop.is_set():
+                        h.ended = True
+                        if log:
+                            log("Space ended.")
+                        h.stop.wait()
+            except PlaylistGone:
+                # Expired signature or the Space moved on: resolve again.
+                pos.playlist_url = None
+            except StartFailed as e:
+                if pos.sequence is None:
+                    if log:
+                        log(str(e))
+                    return False
+                h.stop.wait(1.0)
+            except Exception as e:
+                # Like the yt-dlp path, never let the stream thread die.
+                log_error(e, context="audio_live_loop", extra={"url": url, "sequence": pos.sequence})
+                if log:
+                    log(f"Live playlist error ({type(e).__name__}); retrying...")
+                h.stop.wait(1.0)
+            finally:
+                pos.skipped += reader.skipped
+        return True
+
     def toggle_mute(self, h: AudioHandles) -> bool:
         with h.mpv_lock:
             h.muted = not h.muted
-            if h.mpv and h.mpv.poll() is None:
-                h.mpv.terminate()
-            h.mpv = self._start_mpv(muted=h.muted)
+            _reap(h.mpv)
+            h.mpv = self._start_mpv(muted=h.muted, ipc_path=h.ipc_path, ao=h.ao)
         return h.muted
 
     def _find_cookies_file(self) -> Optional[str]:
@@ -1,13 +1,18 @@
 import os
+import queue
 import re
 import shutil
 import tempfile
 import threading
 import time
-from dataclasses import dataclass
-from typing import Callable, Optional
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
 
 from .error_log import get_error_log_path, log_error
+from .memory_governor import MemoryGovernor, MemoryHistory
+from .profiling import set_session, span
+from .resource_policy import ResourcePolicy, ResourceStats, default_policy
 
 START_WORDS = [
     "Start listening",
@@ -23,11 +28,60 @@ GOT_IT_WORDS = [
     "Aceptar",
 ]
 MOBILE_SCALE = 1.0
+# Browser launch plus first navigation; past this the Edge fallback is used.
+ACQUIRE_TIMEOUT = 90.0
+
+
+BROWSER_ARGS = [
+    "--inprivate",
+    "--disable-features=ExternalProtocolDialog,IntentPicker,AppBanners",
+    "--mute-audio",
+    "--force-dark-mode",
+    "--enable-features=WebUIDarkMode,DarkMode",
+    "--no-first-run",
+    "--no-default-browser-check",
+]
+_PROFILE_LOCK_FILES = ("SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile")
+_FICLONE = 0x40049409
 
 
 def _user_data_dir() -> str:
     return tempfile.mkdtemp(prefix="space_watcher_edge_profile_")
 
+
+def _template_dir() -> str:
+    return os.path.join(tempfile.gettempdir(), "space_watcher_edge_template")
+
+
+def _reflink_or_copy(src: str, dst: str) -> str:
+    try:
+        import fcntl
+
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        shutil.copystat(src, dst)
+        return dst
+    except (ImportError, OSError):
+        return shutil.copy2(src, dst)
+
+
+def _clone_profile(template: str) -> str:
+    # Reflinks share blocks until Edge writes, so the template stays intact
+    # even for SQLite/LevelDB files that are modified in place.
+    dst = _user_data_dir()
+    shutil.copytree(
+        template,
+        dst,
+        copy_function=_reflink_or_copy,
+        ignore=shutil.ignore_patterns(*_PROFILE_LOCK_FILES),
+        dirs_exist_ok=True,
+    )
+    return dst
+
+
+def _call_direct(fn: Callable[[], Any]) -> Any:
+    return fn()
+
 _BLOCK_PROTOCOLS_SCRIPT = """
 (() => {
   const allowed = new Set(["http:", "https:"]);
@@ -65,15 +119,320 @@ class BrowserRuntime:
     thread: threading.Thread
     user_data_dir: str | None = None
     ready: threading.Event | None = None
+    resources: ResourceStats | None = None
+    memory: MemoryHistory = field(default_factory=MemoryHistory)
+
+
+@dataclass
+class ContextLease:
+    id: int
+    context: Any
+    page: Any
+    resources: ResourceStats | None = None
+    user_data_dir: str | None = None
+    cdp: Any = None
+    last_touch: float = field(default_factory=time.monotonic)
+
+    def touch(self) -> None:
+        self.last_touch = time.monotonic()
+
+
+# One long-lived browser handing out isolated contexts. Playwright's sync API
+# is bound to the thread that created it, so every browser call runs on the
+# pool thread and sessions submit work through `call`.
+class BrowserPool:
+    def __init__(
+        self,
+        *,
+        policy: ResourcePolicy,
+        channel: str = "msedge",
+        headless: bool = False,
+        idle_timeout: float = 120.0,
+        lease_timeout: float = 60.0,
+        template_dir: Optional[str] = None,
+    ):
+        self.policy = policy
+        self.channel = channel
+        self.headless = headless
+        self.idle_timeout = idle_timeout
+        self.lease_timeout = lease_timeout
+        self.template_dir = template_dir or _template_dir()
+        self._tasks: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._playwright = None
+        self._browser = None
+        self._frame: Optional[tuple[int, int, int]] = None
+        self._leases: dict[int, ContextLease] = {}
+        self._next_id = 0
+        self._idle_since = time.monotonic()
+
+    def call(self, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        fut: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._tasks.put((fn, fut))
+        try:
+            return fut.result(timeout)
+        except FutureTimeout:
+            fut.cancel()
+            raise
+
+    def acquire(self, url: str, opts, *, persistent: bool = False) -> ContextLease:
+        # A lease opened after the timeout is closed by _reap once idle.
+        return self.call(lambda: self._open(url, opts, persistent), timeout=ACQUIRE_TIMEOUT)
+
+    def release(self, lease: ContextLease) -> None:
+        try:
+            self.call(lambda: self._close(lease), timeout=10)
+        except Exception:
+            pass
+
+    def active_leases(self) -> int:
+        return len(self._leases)
+
+    def _run(self):
+        try:
+            self._serve()
+        except BaseException as e:
+            # Playwright missing or failing to start: fail everything queued
+            # and let the next call start a fresh thread.
+            with self._lock:
+                self._thread = None
+                pending = []
+                while True:
+                    try:
+                        pending.append(self._tasks.get_nowait())
+                    except queue.Empty:
+                        break
+            for _fn, fut in pending:
+                if fut.set_running_or_notify_cancel():
+                    fut.set_exception(e)
+            log_error(e, context="browser_pool")
+
+    def _serve(self):
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as p:
+            self._playwright = p
+            try:
+                while True:
+                    try:
+                        item = self._tasks.get_nowait() if self._leases else self._tasks.get(timeout=0.5)
+                    except queue.Empty:
+                        if self._leases:
+                            self._pump()
+                        if self._reap():
+                            break
+                        continue
+                    fn, fut = item
+                    if not fut.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        fut.set_result(fn())
+                    except BaseException as e:
+                        fut.set_exception(e)
+            finally:
+                for lease in list(self._leases.values()):
+                    self._close(lease)
+                if self._browser:
+                    try:
+                        self._browser.close()
+                    except Exception:
+                        pass
+                self._browser = None
+                self._playwright = None
+
+    def _pump(self):
+        # Route handlers and page events are only dispatched while Playwright
+        # is waiting, so an idle pool must keep the loop turning.
+        for lease in list(self._leases.values()):
+            try:
+                lease.page.wait_for_timeout(50)
+                return
+            except Exception:
+                continue
+        time.sleep(0.05)
+
+    def _reap(self) -> bool:
+        now = time.monotonic()
+        for lease in list(self._leases.values()):
+            if now - lease.last_touch > self.lease_timeout:
+                self._close(lease)
+        if self._leases:
+            return False
+        if now - self._idle_since < self.idle_timeout:
+            return False
+        with self._lock:
+            if not self._tasks.empty():
+                return False
+            self._thread = None
+        return True
+
+    def _ensure_browser(self):
+        if self._browser is None or not self._browser.is_connected():
+            self._browser = self._playwright.chromium.launch(
+                channel=self.channel,
+                headless=self.headless,
+                args=BROWSER_ARGS,
+            )
+            self._frame = None
+        return self._browser
+
+    def _window_frame(self) -> tuple[int, int, int]:
+        # (side border, total width, total height) of the tab strip, address
+        # bar and borders around a page. Measured once per browser on a
+        # throwaway window: the emulated viewport hides the real page size.
+        if self._frame is None:
+            self._frame = (0, 0, 0)
+            if self.headless:
+                return self._frame
+            ctx = self._browser.new_context(no_viewport=True)
+            try:
+                page = ctx.new_page()
+                cdp = ctx.new_cdp_session(page)
+                outer = cdp.send("Browser.getWindowForTarget")["bounds"]
+                inner_w, inner_h = page.evaluate("[window.innerWidth, window.innerHeight]")
+                frame_w = max(0, outer["width"] - inner_w)
+                frame_h = max(0, outer["height"] - inner_h)
+                self._frame = (frame_w // 2, frame_w, frame_h)
+            except Exception:
+                pass
+            finally:
+                ctx.close()
+        return self._frame
+
+    def _ensure_template(self):
+        marker = os.path.join(self.template_dir, ".space_watcher_ready")
+        if os.path.isfile(marker):
+            return
+        shutil.rmtree(self.template_dir, ignore_errors=True)
+        ctx = self._playwright.chromium.launch_persistent_context(
+            self.template_dir,
+            channel=self.channel,
+            headless=True,
+            args=BROWSER_ARGS,
+        )
+        ctx.close()
+        with open(marker, "w", encoding="utf-8") as f:
+            f.write(str(time.time()))
+
+    def _context_kwargs(self, opts) -> dict:
+        return dict(
+            viewport={"width": opts.rect.width, "height": opts.rect.height},
+            user_agent=opts.mobile_user_agent,
+            device_scale_factor=MOBILE_SCALE,
+            is_mobile=True,
+            has_touch=True,
+            screen={"width": opts.rect.width, "height": opts.rect.height},
+            color_scheme="dark",
+        )
+
+    def _open(self, url: str, opts, persistent: bool) -> ContextLease:
+        user_data_dir = None
+        if persistent:
+            self._ensure_template()
+            user_data_dir = _clone_profile(self.template_dir)
+            context = self._playwright.chromium.launch_persistent_context(
+                user_data_dir,
+                channel=self.channel,
+                headless=self.headless,
+                args=[
+                    f"--app={url}",
+                    f"--window-size={opts.rect.width},{opts.rect.height}",
+                    f"--window-position={opts.rect.x},{opts.rect.y}",
+                ]
+                + BROWSER_ARGS,
+                **self._context_kwargs(opts),
+            )
+        else:
+            context = self._ensure_browser().new_context(**self._context_kwargs(opts))
+
+        try:
+            context.add_init_script(_BLOCK_PROTOCOLS_SCRIPT)
+            resources = None
+            if opts.block_resources:
+                resources = ResourceStats()
+                self.policy.install(context, resources)
+            page = context.pages[0] if context.pages else context.new_page()
+            if not persistent:
+                _place_window(context, page, opts.rect, self._window_frame())
+            if not page.url or page.url == "about:blank":
+                page.goto(url, wait_until="domcontentloaded")
+        except Exception:
+            context.close()
+            if user_data_dir:
+                shutil.rmtree(user_data_dir, ignore_errors=True)
+            raise
+
+        self._next_id += 1
+        lease = ContextLease(self._next_id, context, page, resources, user_data_dir)
+        self._leases[lease.id] = lease
+        return lease
+
+    def _close(self, lease: ContextLease):
+        if self._leases.pop(lease.id, None) is None:
+            return
+        try:
+            lease.context.close()
+        except Exception:
+            pass
+        if lease.user_data_dir:
+            shutil.rmtree(lease.user_data_dir, ignore_errors=True)
+        if not self._leases:
+            self._idle_since = time.monotonic()
+
+
+def _place_window(context, page, rect, frame):
+    # Shared-browser contexts cannot use --app or --window-position, so the
+    # window is placed through CDP and grown by the browser frame, with the
+    # page itself on `rect` (what video recordings grab). Headless browsers
+    # have no window.
+    side, frame_w, frame_h = frame
+    try:
+        cdp = context.new_cdp_session(page)
+        win = cdp.send("Browser.getWindowForTarget")
+        cdp.send(
+            "Browser.setWindowBounds",
+            {
+                "windowId": win["windowId"],
+                "bounds": {
+                    "left": rect.x - side,
+                    "top": rect.y - (frame_h - side),
+                    "width": rect.width + frame_w,
+                    "height": rect.height + frame_h,
+                },
+            },
+        )
+        cdp.detach()
+    except Exception:
+        pass
 
 
 class BrowserAutomationService:
-    def __init__(self, log_path: Optional[str] = None):
+    def __init__(
+        self,
+        log_path: Optional[str] = None,
+        policy: Optional[ResourcePolicy] = None,
+        pool: Optional[BrowserPool] = None,
+        governor: Optional[MemoryGovernor] = None,
+    ):
         self.log_path = log_path or get_error_log_path()
+        self.policy = policy or default_policy()
+        self.pool = pool or BrowserPool(policy=self.policy)
+        self.governor = governor or MemoryGovernor()
 
-    def start(self, url, opts, log: Optional[Callable[[str], None]] = None) -> Optional[BrowserRuntime]:
+    def start(
+        self,
+        url,
+        opts,
+        log: Optional[Callable[[str], None]] = None,
+        session_id: Optional[str] = None,
+    ) -> Optional[BrowserRuntime]:
         try:
-            from playwright.sync_api import sync_playwright
+            import playwright.sync_api  # noqa: F401
         except Exception:
             if log:
                 log("Playwright not installed; skipping auto-join.")
@@ -81,70 +440,82 @@ class BrowserAutomationService:
 
         stop = threading.Event()
         ready = threading.Event()
-        user_data_dir = _user_data_dir()
+        rt = BrowserRuntime(stop=stop, thread=threading.Thread(), ready=ready)
+        pool = self.pool
 
         def run():
+            set_session(session_id)
+            lease = None
             try:
-                with sync_playwright() as p:
-                    context = p.chromium.launch_persistent_context(
-                        user_data_dir,
-                        channel="msedge",
-                        headless=False,
-                        args=[
-                            f"--app={url}",
-                            f"--window-size={opts.rect.width},{opts.rect.height}",
-                            f"--window-position={opts.rect.x},{opts.rect.y}",
-                            "--inprivate",
-                            "--disable-features=ExternalProtocolDialog,IntentPicker,AppBanners",
-                            "--mute-audio",
-                            "--force-dark-mode",
-                            "--enable-features=WebUIDarkMode,DarkMode",
-                            "--no-first-run",
-                            "--no-default-browser-check",
-                        ],
-                        viewport={"width": opts.rect.width, "height": opts.rect.height},
-                        user_agent=opts.mobile_user_agent,
-                        device_scale_factor=MOBILE_SCALE,
-                        is_mobile=True,
-                        has_touch=True,
-                        screen={"width": opts.rect.width, "height": opts.rect.height},
-                        color_scheme="dark",
-                    )
-                    context.add_init_script(_BLOCK_PROTOCOLS_SCRIPT)
-                    page = context.pages[0] if context.pages else context.new_page()
-                    if not page.url or page.url == "about:blank":
-                        page.goto(url, wait_until="domcontentloaded")
-
-                    if log:
-                        log("Opening Space in Edge...")
-                    _click_start_listening(page, log)
-                    ready.set()
-                    _dismiss_got_it_for_a_while(page, stop, log)
-
-                    while not stop.is_set():
-                        time.sleep(1)
-
-                    context.close()
+                lease = pool.acquire(url, opts, persistent=opts.persistent_profile)
+                rt.user_data_dir = lease.user_data_dir
+                rt.resources = lease.resources
+
+                if log:
+                    log("Opening Space in Edge...")
+                _click_start_listening(lease.page, log, call=pool.call)
+                ready.set()
+                _dismiss_got_it_for_a_while(lease.page, stop, log, call=pool.call, touch=lease.touch)
+
+                next_sample = time.monotonic() + self.governor.interval
+                last_reload = time.monotonic()
+                while not stop.is_set():
+                    lease.touch()
+                    stop.wait(1)
+                    if stop.is_set() or time.monotonic() < next_sample:
+                        continue
+                    next_sample = time.monotonic() + self.governor.interval
+                    if self._govern_memory(lease, rt, url, stop, log, last_reload):
+                        last_reload = time.monotonic()
             except Exception as e:
                 ready.set()
                 log_error(e, context="browser_automation", extra={"url": url}, log_path=self.log_path)
                 if log:
                     log("Browser automation failed. See errors.json.")
+            finally:
+                if lease:
+                    pool.release(lease)
+                    if lease.resources is not None and log:
+                        log(lease.resources.summary())
+                set_session(None)
 
-        thread = threading.Thread(target=run, daemon=True)
-        thread.start()
-        return BrowserRuntime(stop=stop, thread=thread, user_data_dir=user_data_dir, ready=ready)
+        rt.thread = threading.Thread(target=run, daemon=True)
+        rt.thread.start()
+        return rt
 
     def stop(self, rt: Optional[BrowserRuntime]):
         if not rt:
             return
         rt.stop.set()
         rt.thread.join(timeout=3)
-        if rt.user_data_dir and os.path.isdir(rt.user_data_dir):
-            try:
-                shutil.rmtree(rt.user_data_dir, ignore_errors=True)
-            except Exception:
-                pass
+
+    def _govern_memory(self, lease, rt, url, stop, log, last_reload) -> bool:
+        try:
+            sample = self.pool.call(lambda: self.governor.sample(lease), timeout=10)
+        except Exception:
+            return False
+        rt.memory.add(sample)
+        if not self.governor.over_budget(sample, last_reload):
+            return False
+
+        # Only the page is recycled; audio comes from yt-dlp and keeps going.
+        if log:
+            log(f"Browser heap at {sample.js_heap_total // (1024 * 1024)} MiB; reloading Space page.")
+        try:
+            self.pool.call(lambda: lease.page.goto(url, wait_until="domcontentloaded"), timeout=30)
+            listening = _click_start_listening(lease.page, log, call=self.pool.call)
+            _dismiss_got_it_for_a_while(lease.page, stop, log, call=self.pool.call, touch=lease.touch)
+        except Exception as e:
+            log_error(e, context="browser_memory_reload", extra={"url": url}, log_path=self.log_path)
+            listening = False
+        if listening:
+            rt.memory.reloads += 1
+        else:
+            rt.memory.reload_failures += 1
+            if log:
+                log("Space page reload failed; the page is not listening. Audio keeps playing.")
+        # Failed reloads also wait out the cooldown before the next attempt.
+        return True
 
 
 def _try_click(locator) -> bool:
@@ -165,17 +536,17 @@ def _contains_any_xpath(texts: list[str]) -> str:
     return "//*[" + " or ".join(parts) + "]"
 
 
-def _click_start_listening(page, log: Optional[Callable[[str], None]]):
+def _click_start_listening(page, log: Optional[Callable[[str], None]], call=_call_direct):
     end = time.time() + 30
     start_xpath = _contains_any_xpath(START_WORDS)
     start_re = re.compile(r"(start listening|comenzar a escuchar|iniciar escucha)", re.I)
 
     while time.time() < end:
-        if _try_click(page.get_by_role("button", name=start_re)):
-            if log:
-                log("Clicked Start listening.")
-            return True
-        if _try_click(page.locator(f"xpath={start_xpath}")):
+        with span("automation.start_poll"):
+            clicked = call(lambda: _try_click(page.get_by_role("button", name=start_re))) or call(
+                lambda: _try_click(page.locator(f"xpath={start_xpath}"))
+            )
+        if clicked:
             if log:
                 log("Clicked Start listening.")
             return True
@@ -186,17 +557,24 @@ def _click_start_listening(page, log: Optional[Callable[[str], None]]):
     return False
 
 
-def _dismiss_got_it_for_a_while(page, stop: threading.Event, log: Optional[Callable[[str], None]]):
+def _dismiss_got_it_for_a_while(
+    page,
+    stop: threading.Event,
+    log: Optional[Callable[[str], None]],
+    call=_call_direct,
+    touch: Optional[Callable[[], None]] = None,
+):
     end = time.time() + 60
     got_it_xpath = _contains_any_xpath(GOT_IT_WORDS)
     got_it_re = re.compile(r"(got it|entendido|de acuerdo|ok|okay|aceptar)", re.I)
 
     while time.time() < end and not stop.is_set():
-        clicked = False
-        if _try_click(page.get_by_role("button", name=got_it_re)):
-            clicked = True
-        elif _try_click(page.locator(f"xpath={got_it_xpath}")):
-            clicked = True
+        if touch:
+            touch()
+        with span("automation.got_it_poll"):
+            clicked = call(lambda: _try_click(page.get_by_role("button", name=got_it_re))) or call(
+                lambda: _try_click(page.locator(f"xpath={got_it_xpath}"))
+            )
 
         if clicked and log:
             log("Dismissed a modal.")
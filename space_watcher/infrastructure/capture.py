@@ -0,0 +1,133 @@
+import os
+import sys
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+from ..domain.errors import StartFailed
+from ..domain.models import WindowRect
+
+
+# ffmpeg input arguments for grabbing a screen region.
+@dataclass(frozen=True)
+class CaptureBackend(ABC):
+    name: str
+
+    @abstractmethod
+    def input_args(self, rect: WindowRect, fps: float) -> list[str]:
+        ...
+
+
+@dataclass(frozen=True)
+class GdiGrab(CaptureBackend):
+    name: str = "gdigrab"
+
+    def input_args(self, rect: WindowRect, fps: float) -> list[str]:
+        return [
+            "-f", "gdigrab",
+            "-framerate", _num(fps),
+            "-offset_x", str(rect.x),
+            "-offset_y", str(rect.y),
+            "-video_size", f"{rect.width}x{rect.height}",
+            "-i", "desktop",
+        ]
+
+
+# Linux/X11, including Xvfb (DISPLAY=:99).
+@dataclass(frozen=True)
+class X11Grab(CaptureBackend):
+    name: str = "x11grab"
+    display: Optional[str] = None
+
+    def input_args(self, rect: WindowRect, fps: float) -> list[str]:
+        display = self.display or os.environ.get("DISPLAY") or ":0"
+        if "." not in display.rsplit(":", 1)[-1]:
+            display += ".0"
+        return [
+            "-f", "x11grab",
+            "-framerate", _num(fps),
+            "-draw_mouse", "0",
+            "-video_size", f"{rect.width}x{rect.height}",
+            "-i", f"{display}+{rect.x},{rect.y}",
+        ]
+
+
+CAPTURE_BACKENDS = {b.name: b for b in (GdiGrab(), X11Grab())}
+
+
+def default_backend() -> CaptureBackend:
+    if sys.platform == "win32":
+        return CAPTURE_BACKENDS["gdigrab"]
+    if sys.platform.startswith(("linux", "freebsd", "openbsd")):
+        return CAPTURE_BACKENDS["x11grab"]
+    # macOS has no region grabber here (avfoundation captures whole screens).
+    raise StartFailed(
+        f"Video recording is not supported on {sys.platform}. "
+        "Record audio only, or pass a capture backend explicitly (e.g. x11grab under XQuartz)."
+    )
+
+
+def get_backend(name: Optional[str]) -> CaptureBackend:
+    if not name:
+        return default_backend()
+    backend = CAPTURE_BACKENDS.get(name)
+    if backend is None:
+        raise StartFailed(f"Unknown capture backend '{name}'. Use one of: {', '.join(CAPTURE_BACKENDS)}.")
+    return backend
+
+
+# Encoder settings. The Space UI is mostly static, so the cheap presets grab
+# few frames, tune x264 for still images, cap the bitrate and optionally
+# drop frames identical to the previous one (mpdecimate + VFR).
+@dataclass(frozen=True)
+class CapturePreset:
+    name: str
+    fps: float
+    x264_preset: str = "veryfast"
+    tune: Optional[str] = None
+    crf: Optional[int] = None
+    maxrate: Optional[str] = None
+    gop_seconds: Optional[float] = None
+    dedupe: bool = False
+
+    def video_args(self) -> list[str]:
+        args = []
+        if self.dedupe:
+            args += ["-vf", "mpdecimate", "-fps_mode", "vfr"]
+        args += ["-c:v", "libx264", "-preset", self.x264_preset]
+        if self.tune:
+            args += ["-tune", self.tune]
+        if self.crf is not None:
+            args += ["-crf", str(self.crf)]
+        if self.maxrate:
+            args += ["-maxrate", self.maxrate, "-bufsize", self.maxrate]
+        if self.gop_seconds:
+            args += ["-g", str(max(1, int(self.fps * self.gop_seconds)))]
+        args += ["-pix_fmt", "yuv420p"]
+        if not self.dedupe:
+            args += ["-r", _num(self.fps)]
+        return args
+
+
+CAPTURE_PRESETS = {
+    p.name: p
+    for p in (
+        # What recordings always used: 30 fps, x264 defaults.
+        CapturePreset("standard", 30),
+        CapturePreset("low", 10, tune="stillimage", crf=28, maxrate="400k", gop_seconds=10),
+        CapturePreset("still", 5, tune="stillimage", crf=30, maxrate="200k", gop_seconds=20, dedupe=True),
+        CapturePreset("minimal", 2, x264_preset="ultrafast", tune="stillimage", crf=32, maxrate="100k",
+                      gop_seconds=30, dedupe=True),
+    )
+}
+
+
+def get_preset(name: Optional[str]) -> CapturePreset:
+    preset = CAPTURE_PRESETS.get(name or "standard")
+    if preset is None:
+        raise StartFailed(f"Unknown capture preset '{name}'. Use one of: {', '.join(CAPTURE_PRESETS)}.")
+    return preset
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else str(v)
@@ -1,7 +1,13 @@
+import json
 import os
 import re
 import shutil
+import subprocess
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
 from ..domain.errors import MissingDependency
 
 def require_cmd(cmd: str) -> str:
@@ -88,3 +94,204 @@ def _add_to_path(dir_path: str) -> None:
     parts = current.split(os.pathsep) if current else []
     if dir_path not in parts:
         os.environ["PATH"] = dir_path + os.pathsep + current
+
+
+DEFAULT_DEPS = ("yt-dlp", "mpv", "ffmpeg")
+# ffmpeg demuxers the pipelines rely on: the piped stream and audio-only
+# recordings.
+FFMPEG_DEMUXERS = ("mpegts", "aac")
+
+
+def cache_dir() -> str:
+    env_dir = os.environ.get("SPACE_WATCHER_CACHE_DIR")
+    if env_dir:
+        return env_dir
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "space_watcher")
+
+
+@dataclass(frozen=True)
+class BinaryInfo:
+    name: str
+    path: Optional[str]
+    version: Optional[str] = None
+    capabilities: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.path) and not self.error
+
+
+def _run(cmd: list[str], timeout: float) -> str:
+    proc = subprocess.run(cmd, capture_output=True, timeout=timeout, stdin=subprocess.DEVNULL)
+    out = proc.stdout.decode("utf-8", "replace")
+    if proc.returncode != 0:
+        err = (proc.stderr.decode("utf-8", "replace").strip() or out.strip()).splitlines()
+        raise RuntimeError(err[-1] if err else f"exit code {proc.returncode}")
+    return out
+
+
+def _first_line(text: str) -> str:
+    return text.strip().splitlines()[0].strip() if text.strip() else ""
+
+
+def _probe_ytdlp(path: str, timeout: float) -> tuple[str, dict]:
+    return _first_line(_run([path, "--version"], timeout)), {}
+
+
+def _probe_mpv(path: str, timeout: float) -> tuple[str, dict]:
+    version = _first_line(_run([path, "--no-config", "--version"], timeout))
+    aos = []
+    for line in _run([path, "--no-config", "--ao=help"], timeout).splitlines():
+        # "  pipewire         PipeWire audio output"
+        parts = line.split()
+        if line.startswith(" ") and parts and parts[0].isidentifier():
+            aos.append(parts[0])
+    return version, {"audio_outputs": aos}
+
+
+def _ffmpeg_names(text: str) -> list[str]:
+    # "-demuxers"/"-devices" rows after the "--" separator:
+    #   " D  mpegts   MPEG-TS ..." or, on newer builds, " D d x11grab ..."
+    names = []
+    rows = text.split("\n --\n", 1)[-1]
+    for line in rows.splitlines():
+        parts = line.split()
+        i = 0
+        while i < len(parts) and set(parts[i]) <= set("DEd."):
+            i += 1
+        if 0 < i < len(parts) and parts[i] != "=":
+            names.extend(parts[i].split(","))
+    return names
+
+
+def _probe_ffmpeg(path: str, timeout: float) -> tuple[str, dict]:
+    version = _first_line(_run([path, "-hide_banner", "-version"], timeout))
+    demuxers = _ffmpeg_names(_run([path, "-hide_banner", "-demuxers"], timeout))
+    devices = _ffmpeg_names(_run([path, "-hide_banner", "-devices"], timeout))
+    missing = [d for d in FFMPEG_DEMUXERS if d not in demuxers]
+    if missing:
+        raise RuntimeError(f"built without demuxer(s): {', '.join(missing)}")
+    return version, {"demuxers": demuxers, "devices": devices}
+
+
+_PROBES = {"yt-dlp": _probe_ytdlp, "mpv": _probe_mpv, "ffmpeg": _probe_ffmpeg}
+
+
+# Resolves each binary once per process and checks that it runs. Probe
+# results are cached on disk keyed by path, size and mtime, so an unchanged
+# binary is not executed again on the next launch.
+class DependencyRegistry:
+    def __init__(self, cache_path: Optional[str] = None, timeout: float = 15.0):
+        self.cache_path = cache_path or os.path.join(cache_dir(), "deps.json")
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._futures: dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._disk: Optional[dict] = None
+
+    def warm(self, names=DEFAULT_DEPS, log=None) -> dict[str, BinaryInfo]:
+        futures = {name: self._submit(name, log) for name in names}
+        return {name: f.result() for name, f in futures.items()}
+
+    def info(self, name: str, log=None) -> BinaryInfo:
+        return self._submit(name, log).result()
+
+    def require(self, name: str, log=None) -> str:
+        info = self.info(name, log)
+        if not info.path:
+            raise MissingDependency(info.error)
+        if info.error:
+            raise MissingDependency(f"'{name}' at {info.path} does not work: {info.error}")
+        return info.path
+
+    def _submit(self, name: str, log) -> Future:
+        with self._lock:
+            fut = self._futures.get(name)
+            # A missing binary may be installed while the app is open.
+            if fut is not None and fut.done() and not fut.result().path:
+                fut = None
+            if fut is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=len(DEFAULT_DEPS), thread_name_prefix="deps")
+                fut = self._futures[name] = self._executor.submit(self._probe, name, log)
+            return fut
+
+    def _probe(self, name: str, log) -> BinaryInfo:
+        try:
+            path = ensure_cmd(name, log=log)
+        except MissingDependency as e:
+            return BinaryInfo(name, None, error=str(e))
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            return BinaryInfo(name, path, error=str(e))
+        key = f"{st.st_size}:{st.st_mtime_ns}"
+        cached = self._cached(path, key)
+        if cached is not None:
+            return BinaryInfo(name, path, cached.get("version"), cached.get("capabilities") or {}, cached.get("error"))
+
+        probe = _PROBES.get(name)
+        version, caps, error = None, {}, None
+        transient = False
+        if probe:
+            try:
+                version, caps = probe(path, self.timeout)
+            except subprocess.TimeoutExpired:
+                error = f"no answer within {self.timeout:.0f} s"
+                transient = True
+            except (OSError, RuntimeError) as e:
+                error = str(e) or type(e).__name__
+        info = BinaryInfo(name, path, version, caps, error)
+        if log:
+            log(f"{name}: {version or error or path}")
+        if not transient:
+            self._store(path, key, info)
+        return info
+
+    def _cached(self, path: str, key: str) -> Optional[dict]:
+        with self._lock:
+            if self._disk is None:
+                try:
+                    with open(self.cache_path, "r", encoding="utf-8") as f:
+                        self._disk = json.load(f)
+                except (OSError, ValueError):
+                    self._disk = {}
+            entry = self._disk.get(path)
+        if isinstance(entry, dict) and entry.get("key") == key:
+            return entry
+        return None
+
+    def _store(self, path: str, key: str, info: BinaryInfo) -> None:
+        with self._lock:
+            self._disk = dict(self._disk or {})
+            self._disk[path] = {
+                "key": key,
+                "version": info.version,
+                "capabilities": info.capabilities,
+                "error": info.error,
+            }
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._disk, f, indent=2)
+                os.replace(tmp, self.cache_path)
+            except OSError:
+                pass
+
+
+_default_registry: Optional[DependencyRegistry] = None
+_default_lock = threading.Lock()
+
+
+def default_registry() -> DependencyRegistry:
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = DependencyRegistry()
+        return _default_registry
@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 from typing import Any, Optional
 
 
-def _default_log_dir() -> str:
+def log_dir() -> str:
     env_dir = os.environ.get("SPACE_WATCHER_LOG_DIR")
     if env_dir:
         return env_dir
@@ -21,7 +21,7 @@ def _default_log_dir() -> str:
 
 
 def get_error_log_path() -> str:
-    base_dir = _default_log_dir()
+    base_dir = log_dir()
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     return os.path.join(base_dir, f"space_watcher_errors_{ts}.json")
 
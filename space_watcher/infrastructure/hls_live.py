@@ -0,0 +1,123 @@
+import http.client
+import threading
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from ..domain.errors import StartFailed
+from .replay_download import parse_playlist
+
+_UA = "Mozilla/5.0 (space_watcher live)"
+# Cold starts begin this many segments behind the live edge, like players do.
+LIVE_EDGE_SEGMENTS = 3
+
+
+# Where a resumable session is in the Space's live playlist. Updated by the
+# stream loop together with the recording, read by the snapshot writer.
+@dataclass
+class LivePosition:
+    playlist_url: Optional[str] = None
+    auth: Optional[str] = None
+    sequence: Optional[int] = None
+    skipped: int = 0
+
+
+class PlaylistGone(StartFailed):
+    pass
+
+
+def _header(text: str, tag: str) -> Optional[str]:
+    for line in text.splitlines():
+        if line.startswith(tag + ":"):
+            return line.split(":", 1)[1].strip()
+    return None
+
+
+def media_sequence(text: str) -> int:
+    return int(_header(text, "#EXT-X-MEDIA-SEQUENCE") or 0)
+
+
+def target_duration(text: str) -> float:
+    return float(_header(text, "#EXT-X-TARGETDURATION") or 2)
+
+
+# Polls a live media playlist and yields (media sequence, segment bytes) in
+# order, starting after `after` (the last sequence already delivered) or near
+# the live edge.
+class LivePlaylistReader:
+    def __init__(self, url: str, *, after: Optional[int] = None, timeout: float = 10.0, retries: int = 3, log=None):
+        self.url = url
+        self.next = None if after is None else after + 1
+        self.timeout = timeout
+        self.retries = retries
+        self.log = log
+        self.skipped = 0
+
+    def _fetch(self, url: str) -> bytes:
+        req = urllib.request.Request(url, headers={"User-Agent": _UA})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return resp.read()
+
+    def _fetch_retrying(self, url: str, stop: threading.Event) -> Optional[bytes]:
+        delay = 0.5
+        for attempt in range(self.retries + 1):
+            try:
+                return self._fetch(url)
+            except urllib.error.HTTPError as e:
+                # Signed URLs expire and ended Spaces 404: re-resolve.
+                if e.code in (401, 403, 404, 410):
+                    raise PlaylistGone(f"Playlist returned HTTP {e.code}.") from e
+                if attempt == self.retries:
+                    raise StartFailed(f"Playlist fetch failed: HTTP {e.code}") from e
+            except (OSError, urllib.error.URLError, http.client.HTTPException) as e:
+                # HTTPException covers IncompleteRead: a truncated segment.
+                if attempt == self.retries:
+                    raise StartFailed(f"Playlist fetch failed: {e}") from e
+            if stop.wait(delay):
+                return None
+            delay = min(delay * 2, 4.0)
+        return None
+
+    def _media_playlist(self, stop: threading.Event) -> Optional[str]:
+        raw = self._fetch_retrying(self.url, stop)
+        if raw is None:
+            return None
+        text = raw.decode("utf-8", "replace")
+        fragments, variants = parse_playlist(text, self.url)
+        if not fragments and variants:
+            # Follow the master once; later polls go to the media playlist.
+            self.url = max(variants)[1]
+            return self._media_playlist(stop)
+        return text
+
+    def segments(self, stop: threading.Event) -> Iterator[tuple[int, bytes]]:
+        while not stop.is_set():
+            text = self._media_playlist(stop)
+            if text is None:
+                return
+            first = media_sequence(text)
+            fragments, _ = parse_playlist(text, self.url)
+            if self.next is None:
+                self.next = first + max(0, len(fragments) - LIVE_EDGE_SEGMENTS)
+            elif self.next < first:
+                self.skipped += first - self.next
+                if self.log:
+                    self.log(f"{first - self.next} segment(s) left the live window before they could be fetched.")
+                self.next = first
+            fresh = False
+            for frag in fragments:
+                seq = first + frag.index
+                if seq < self.next:
+                    continue
+                data = self._fetch_retrying(frag.url, stop)
+                if data is None:
+                    return
+                self.next = seq + 1
+                fresh = True
+                yield seq, data
+            if "#EXT-X-ENDLIST" in text:
+                return
+            # A new segment appears about once per target duration.
+            wait = target_duration(text)
+            stop.wait(wait if fresh else wait / 2)
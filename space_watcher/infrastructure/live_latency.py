@@ -0,0 +1,239 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+TS_PACKET = 188
+TS_SYNC = 0x47
+_PTS_WRAP = 1 << 33
+_PTS_HZ = 90000.0
+_PES_START = b"\x00\x00\x01"
+
+
+def _ts_offset(data: bytes) -> int:
+    # Reads are not packet aligned; find a sync byte that repeats one packet on.
+    for i in range(min(TS_PACKET, len(data))):
+        if data[i] == TS_SYNC and (i + TS_PACKET >= len(data) or data[i + TS_PACKET] == TS_SYNC):
+            return i
+    return -1
+
+
+def first_pts(data: bytes) -> Optional[int]:
+    # PTS (90 kHz ticks) of the first audio PES header in an MPEG-TS chunk.
+    # Searching for the start code keeps this at C speed on the hot path.
+    off = _ts_offset(data)
+    if off < 0:
+        return None
+    p = data.find(_PES_START, off)
+    while 0 <= p <= len(data) - 14:
+        pkt = off + (p - off) // TS_PACKET * TS_PACKET
+        stream_id = data[p + 3]
+        if (
+            data[pkt] == TS_SYNC
+            and data[pkt + 1] & 0x40
+            and p + 14 <= pkt + TS_PACKET
+            and (0xC0 <= stream_id <= 0xDF or stream_id == 0xBD)
+            and data[p + 7] & 0x80
+        ):
+            t = data[p + 9:p + 14]
+            return (
+                ((t[0] >> 1) & 0x07) << 30
+                | t[1] << 22
+                | (t[2] >> 1) << 15
+                | t[3] << 7
+                | t[4] >> 1
+            )
+        p = data.find(_PES_START, p + 1)
+    return None
+
+
+# How far the data coming out of yt-dlp trails the wall clock since the
+# connection was made: media time (PTS) should advance as fast as real time,
+# so any shortfall is a stall upstream. Reset on every reconnect, since
+# yt-dlp rejoins at the live edge of the playlist.
+class IngestClock:
+    def __init__(self, min_interval: float = 0.5):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._anchor: Optional[tuple[int, float]] = None
+            self._pts_elapsed = 0.0
+            self._last_parse = 0.0
+
+    def feed(self, data: bytes) -> None:
+        now = time.monotonic()
+        if now - self._last_parse < self.min_interval:
+            return
+        self._last_parse = now
+        pts = first_pts(data)
+        if pts is None:
+            return
+        with self._lock:
+            if self._anchor is None:
+                self._anchor = (pts, now)
+                self._pts_elapsed = 0.0
+                return
+            elapsed = ((pts - self._anchor[0]) % _PTS_WRAP) / _PTS_HZ
+            # A jump backwards or far ahead is a discontinuity, not a catch-up.
+            if elapsed < self._pts_elapsed or elapsed - self._pts_elapsed > 60:
+                self._anchor = (pts, now)
+                self._pts_elapsed = 0.0
+            else:
+                self._pts_elapsed = elapsed
+
+    def lag(self) -> Optional[float]:
+        with self._lock:
+            if self._anchor is None:
+                return None
+            return max(0.0, time.monotonic() - self._anchor[1] - self._pts_elapsed)
+
+
+def mpv_ipc_path(tag: str) -> str:
+    if os.name == "nt":
+        return rf"\\.\pipe\space_watcher_mpv_{tag}"
+    return os.path.join(tempfile.gettempdir(), f"space_watcher_mpv_{tag}.sock")
+
+
+# Minimal JSON IPC client for mpv's --input-ipc-server. Every call reconnects
+# lazily, so it survives mpv being respawned on mute or after a crash.
+class MpvIpc:
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.path = path
+        self.timeout = timeout
+        self._f = None
+        self._sock = None
+        self._next_id = 0
+
+    def _connect(self):
+        if self._f is not None:
+            return self._f
+        if os.name == "nt":
+            self._f = open(self.path, "r+b", buffering=0)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._sock = sock
+            self._f = sock.makefile("rwb")
+        return self._f
+
+    def close(self) -> None:
+        for obj in (self._f, self._sock):
+            if obj is not None:
+                try:
+                    obj.close()
+                except OSError:
+                    pass
+        self._f = self._sock = None
+
+    def _request(self, *args) -> Optional[dict]:
+        try:
+            f = self._connect()
+            self._next_id += 1
+            req = self._next_id
+            f.write(json.dumps({"command": list(args), "request_id": req}).encode() + b"\n")
+            f.flush()
+            while True:
+                line = f.readline()
+                if not line:
+                    raise OSError("mpv closed the IPC connection")
+                msg = json.loads(line)
+                # Event lines are interleaved with replies.
+                if msg.get("request_id") == req:
+                    return msg if msg.get("error") == "success" else None
+        except (OSError, ValueError):
+            self.close()
+            return None
+
+    def command(self, *args) -> bool:
+        return self._request(*args) is not None
+
+    def get(self, prop: str) -> Any:
+        reply = self._request("get_property", prop)
+        return reply.get("data") if reply else None
+
+    def set(self, prop: str, value) -> bool:
+        return self.command("set_property", prop, value)
+
+
+@dataclass(frozen=True)
+class CatchUpPolicy:
+    interval: float = 2.0
+    target: float = 2.0
+    speed_above: float = 6.0
+    jump_above: float = 20.0
+    speed: float = 1.08
+    enabled: bool = True
+
+
+@dataclass(frozen=True)
+class LatencyEstimate:
+    ingest_lag: Optional[float]
+    player_buffer: Optional[float]
+    speed: float
+    catch_ups: int
+    timestamp: float
+
+    @property
+    def total(self) -> Optional[float]:
+        if self.ingest_lag is None and self.player_buffer is None:
+            return None
+        return (self.ingest_lag or 0.0) + (self.player_buffer or 0.0)
+
+
+# Catch-up only touches the player: speeding up or seeking inside mpv's
+# cache never changes what is fed to ffmpeg, so recordings keep every byte.
+class LatencyMonitor:
+    def __init__(self, clock: IngestClock, ipc: MpvIpc, policy: Optional[CatchUpPolicy] = None, log=None):
+        self.clock = clock
+        self.ipc = ipc
+        self.policy = policy or CatchUpPolicy()
+        self.log = log
+        self.latest: Optional[LatencyEstimate] = None
+        self._speed = 1.0
+        self._catch_ups = 0
+
+    def run(self, stop: threading.Event) -> None:
+        while not stop.wait(self.policy.interval):
+            self.check()
+        self.ipc.close()
+
+    def check(self) -> LatencyEstimate:
+        # Decisions use the whole distance to live (ingest lag + mpv's cache),
+        # but only the cached part can be skipped or played off faster.
+        p = self.policy
+        lag = self.clock.lag()
+        buffered = self.ipc.get("demuxer-cache-duration")
+        behind = (lag or 0.0) + (buffered or 0.0)
+        if buffered is None:
+            # Fresh mpv (respawned or not up yet) plays at normal speed.
+            self._speed = 1.0
+        elif not p.enabled:
+            pass
+        elif behind > p.jump_above and buffered > p.target:
+            if self.ipc.command("seek", round(buffered - p.target, 2), "relative"):
+                self._catch_ups += 1
+                if self.log:
+                    self.log(f"Jumped {buffered - p.target:.0f} s ahead towards the live edge.")
+        elif behind > p.speed_above and buffered > p.target and self._speed == 1.0:
+            if self.ipc.set("speed", p.speed):
+                self._speed = p.speed
+                self._catch_ups += 1
+        elif (behind <= p.target or buffered <= p.target) and self._speed != 1.0:
+            if self.ipc.set("speed", 1.0):
+                self._speed = 1.0
+        self.latest = LatencyEstimate(
+            ingest_lag=lag,
+            player_buffer=buffered,
+            speed=self._speed,
+            catch_ups=self._catch_ups,
+            timestamp=time.time(),
+        )
+        return self.latest
@@ -0,0 +1,71 @@
+import json
+import subprocess
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from ..domain.validators import is_valid_space_url
+
+
+@dataclass(frozen=True)
+class LiveStatus:
+    key: str
+    live: bool
+    url: Optional[str] = None
+
+
+# Batched lookup against a status service:
+#   GET <base_url>?ids=a,b,c -> {"a": {"live": true, "url": "..."}, ...}
+# Keys missing from the reply are treated as not live.
+class HttpStatusSource:
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def check(self, keys: list[str]) -> dict[str, LiveStatus]:
+        sep = "&" if "?" in self.base_url else "?"
+        url = f"{self.base_url}{sep}{urllib.parse.urlencode({'ids': ','.join(keys)})}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+            data = json.loads(resp.read().decode("utf-8"))
+        out = {}
+        for key in keys:
+            item = data.get(key) or {}
+            out[key] = LiveStatus(key, bool(item.get("live")), item.get("url"))
+        return out
+
+
+# Probes Space URLs with yt-dlp metadata extraction. Accounts cannot be
+# resolved this way and always report not live.
+class YtDlpStatusSource:
+    def __init__(self, max_workers: int = 4, timeout: float = 30.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def check(self, keys: list[str]) -> dict[str, LiveStatus]:
+        urls = [k for k in keys if is_valid_space_url(k)]
+        out = {k: LiveStatus(k, False) for k in keys}
+        if not urls:
+            return out
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as ex:
+            for key, live in zip(urls, ex.map(self._probe, urls)):
+                out[key] = LiveStatus(key, live, key if live else None)
+        return out
+
+    def _probe(self, url: str) -> bool:
+        try:
+            proc = subprocess.run(
+                ["yt-dlp", "--dump-single-json", "--skip-download", "--no-warnings", "--no-cookies", url],
+                capture_output=True,
+                timeout=self.timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        if proc.returncode != 0:
+            return False
+        try:
+            info = json.loads(proc.stdout.decode("utf-8", "replace"))
+        except ValueError:
+            return False
+        return info.get("live_status") == "is_live" or info.get("is_live") is True
@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class MemorySample:
+    timestamp: float
+    js_heap_used: int
+    js_heap_total: int
+    nodes: int
+    documents: int
+
+
+@dataclass
+class MemoryHistory:
+    max_samples: int = 240
+    reloads: int = 0
+    reload_failures: int = 0
+    _samples: deque = field(default_factory=deque, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, sample: MemorySample) -> None:
+        with self._lock:
+            self._samples.append(sample)
+            while len(self._samples) > self.max_samples:
+                self._samples.popleft()
+
+    def samples(self) -> list[MemorySample]:
+        with self._lock:
+            return list(self._samples)
+
+    def latest(self) -> Optional[MemorySample]:
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+
+@dataclass(frozen=True)
+class MemoryGovernor:
+    budget_bytes: int = 384 * 1024 * 1024
+    interval: float = 30.0
+    # Grace period after a reload so the fresh page can settle before the
+    # next decision.
+    cooldown: float = 300.0
+
+    def sample(self, lease) -> MemorySample:
+        # Runs on the pool thread. Performance.getMetrics is per page, which
+        # keeps the numbers attributable to one session in a shared browser.
+        cdp = lease.cdp
+        if cdp is None:
+            cdp = lease.context.new_cdp_session(lease.page)
+            cdp.send("Performance.enable")
+            lease.cdp = cdp
+        metrics = {m["name"]: m["value"] for m in cdp.send("Performance.getMetrics")["metrics"]}
+        return MemorySample(
+            timestamp=time.time(),
+            js_heap_used=int(metrics.get("JSHeapUsedSize", 0)),
+            js_heap_total=int(metrics.get("JSHeapTotalSize", 0)),
+            nodes=int(metrics.get("Nodes", 0)),
+            documents=int(metrics.get("Documents", 0)),
+        )
+
+    def over_budget(self, sample: MemorySample, last_reload: float) -> bool:
+        if time.monotonic() - last_reload < self.cooldown:
+            return False
+        return sample.js_heap_total > self.budget_bytes
@@ -0,0 +1,96 @@
+import os
+import shutil
+from typing import Iterable, Optional
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def total_rss_bytes(pids: Iterable[Optional[int]]) -> Optional[int]:
+    total = None
+    for pid in pids:
+        if not pid:
+            continue
+        rss = rss_bytes(pid)
+        if rss is not None:
+            total = (total or 0) + rss
+    return total
+
+
+def host_load() -> Optional[float]:
+    # 1-minute load normalised by CPU count; None where unavailable (Windows).
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+def disk_free_bytes(path: str) -> Optional[int]:
+    probe = path
+    while probe and not os.path.exists(probe):
+        parent = os.path.dirname(probe)
+        if parent == probe:
+            break
+        probe = parent
+    try:
+        return shutil.disk_usage(probe or ".").free
+    except OSError:
+        return None
+
+
+def _read_stat(pid: int) -> Optional[list[str]]:
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="ascii", errors="replace") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces; fields resume after the last ')'.
+    return raw[raw.rfind(")") + 2:].split()
+
+
+def child_pids(pid: int) -> list[int]:
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    parents: dict[int, list[int]] = {}
+    for name in entries:
+        if not name.isdigit():
+            continue
+        fields = _read_stat(int(name))
+        if fields:
+            parents.setdefault(int(fields[1]), []).append(int(name))
+    out, todo = [], [pid]
+    while todo:
+        for child in parents.get(todo.pop(), []):
+            out.append(child)
+            todo.append(child)
+    return out
+
+
+def process_sample(pid: int) -> Optional[dict]:
+    # CPU seconds, RSS, open FDs and threads for one process (Linux only).
+    fields = _read_stat(pid)
+    if not fields:
+        return None
+    ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    try:
+        fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        fds = 0
+    return {
+        "pid": pid,
+        "state": fields[0],
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+        "threads": int(fields[17]),
+        "rss_bytes": int(fields[21]) * _PAGE_SIZE,
+        "fds": fds,
+    }
@@ -0,0 +1,229 @@
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from .error_log import log_dir, log_error
+
+# Thread ident -> active span names / session ID. Kept in plain dicts rather
+# than threading.local so the sampler thread can read them.
+_SPANS: dict[int, list[str]] = {}
+_SESSIONS: dict[int, str] = {}
+_STATS: dict[str, list[float]] = {}
+_stats_lock = threading.Lock()
+_timing = False
+
+
+class span:
+    __slots__ = ("name", "_t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        ident = threading.get_ident()
+        stack = _SPANS.get(ident)
+        if stack is None:
+            stack = _SPANS[ident] = []
+        stack.append(self.name)
+        self._t0 = time.perf_counter() if _timing else 0.0
+        return self
+
+    def __exit__(self, *_exc):
+        ident = threading.get_ident()
+        stack = _SPANS.get(ident)
+        if stack:
+            stack.pop()
+            if not stack:
+                del _SPANS[ident]
+        if _timing and self._t0:
+            elapsed = time.perf_counter() - self._t0
+            with _stats_lock:
+                st = _STATS.get(self.name)
+                if st is None:
+                    st = _STATS[self.name] = [0, 0.0, 0.0]
+                st[0] += 1
+                st[1] += elapsed
+                st[2] = max(st[2], elapsed)
+        return False
+
+
+def set_session(session_id: Optional[str]) -> None:
+    # Threads clear their tag on exit; dead idents are also pruned here, as
+    # the OS reuses them for new threads.
+    ident = threading.get_ident()
+    if session_id:
+        alive = {t.ident for t in threading.enumerate()}
+        for stale in [i for i in list(_SESSIONS) if i not in alive]:
+            _SESSIONS.pop(stale, None)
+        _SESSIONS[ident] = session_id
+    else:
+        _SESSIONS.pop(ident, None)
+
+
+def span_stats() -> dict[str, dict[str, float]]:
+    with _stats_lock:
+        return {
+            name: {"count": c, "total_ms": total * 1000, "max_ms": peak * 1000}
+            for name, (c, total, peak) in _STATS.items()
+        }
+
+
+def dump_threads() -> str:
+    frames = sys._current_frames()
+    lines = [f"# Thread dump {datetime.now().isoformat()} pid={os.getpid()}"]
+    for t in threading.enumerate():
+        frame = frames.get(t.ident)
+        # Other threads add and delete entries meanwhile; read each once.
+        tags = []
+        session = _SESSIONS.get(t.ident)
+        spans = list(_SPANS.get(t.ident) or ())
+        if session:
+            tags.append(f"session={session}")
+        if spans:
+            tags.append("spans=" + ">".join(spans))
+        lines.append("")
+        lines.append(f'Thread "{t.name}" ident={t.ident} daemon={t.daemon} {" ".join(tags)}'.rstrip())
+        if frame is not None:
+            lines.extend(line.rstrip("\n") for line in traceback.format_stack(frame))
+    return "\n".join(lines) + "\n"
+
+
+def _output_path(kind: str, tag: Optional[str], ext: str) -> str:
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    name = f"space_watcher_{kind}_{tag + '_' if tag else ''}{ts}.{ext}"
+    return os.path.join(log_dir(), name)
+
+
+def write_thread_dump(path: Optional[str] = None) -> str:
+    path = path or _output_path("threads", None, "txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dump_threads())
+    return path
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{code.co_name}"
+
+
+# Wall-clock stack sampler writing collapsed stacks (flamegraph.pl /
+# speedscope input). Each line is prefixed with the session and active spans
+# of the sampled thread.
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, session_id: Optional[str] = None):
+        self.interval = interval
+        self.session_id = session_id
+        self.samples: Counter = Counter()
+
+    def run(self, seconds: float) -> None:
+        global _timing
+        me = threading.get_ident()
+        names = {}
+        _timing = True
+        try:
+            end = time.perf_counter() + seconds
+            while time.perf_counter() < end:
+                for t in threading.enumerate():
+                    names[t.ident] = t.name
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    session = _SESSIONS.get(ident)
+                    if self.session_id and session != self.session_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_name(frame))
+                        frame = frame.f_back
+                    prefix = [f"session:{session or '-'}", f"thread:{names.get(ident, ident)}"]
+                    prefix += [f"span:{s}" for s in list(_SPANS.get(ident, ()))]
+                    self.samples[";".join(prefix + stack[::-1])] += 1
+                time.sleep(self.interval)
+        finally:
+            _timing = False
+
+    def write(self, path: Optional[str] = None) -> str:
+        path = path or _output_path("profile", self.session_id, "folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def profile(seconds: float, session_id: Optional[str] = None, interval: float = 0.005) -> str:
+    prof = SamplingProfiler(interval=interval, session_id=session_id)
+    prof.run(seconds)
+    return prof.write()
+
+
+# Line-based local control channel:
+#   threads                 -> path of a thread dump
+#   profile SECONDS [SID]   -> path of a collapsed-stack profile
+#   spans                   -> JSON span timings (collected while profiling)
+class ControlServer:
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()[:2]
+
+    def start(self) -> "ControlServer":
+        threading.Thread(target=self._accept_loop, name="space_watcher-control", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, _addr = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock: socket.socket):
+        with sock, sock.makefile("rw", encoding="utf-8", newline="\n") as f:
+            for line in f:
+                f.write(self.handle(line.split()) + "\n")
+                f.flush()
+
+    def handle(self, args: list[str]) -> str:
+        if not args:
+            return "error: empty command"
+        cmd = args[0]
+        try:
+            if cmd == "threads":
+                return write_thread_dump()
+            if cmd == "profile":
+                seconds = float(args[1]) if len(args) > 1 else 10.0
+                return profile(seconds, args[2] if len(args) > 2 else None)
+            if cmd == "spans":
+                return json.dumps(span_stats())
+        except Exception as e:
+            return f"error: {e}"
+        return f"error: unknown command {cmd!r}"
+
+
+def install_profiling_hooks() -> Optional[ControlServer]:
+    # SIGUSR1 writes a thread dump (POSIX). SPACE_WATCHER_CONTROL_PORT opts
+    # into the local control server, which also works on Windows.
+    if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, lambda *_: write_thread_dump())
+    port = os.environ.get("SPACE_WATCHER_CONTROL_PORT")
+    if not port:
+        return None
+    # Diagnostics only: a busy port or a typo must not stop the app.
+    try:
+        return ControlServer(int(port)).start()
+    except (OSError, ValueError) as e:
+        log_error(e, context="control_server", extra={"port": port})
+        print(f"Control server not started on port {port!r}: {e}", file=sys.stderr)
+        return None
@@ -1,34 +1,96 @@
 import os
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
+from ..domain.errors import MissingDependency
 from ..domain.models import WindowRect
+from .capture import CaptureBackend, CapturePreset, get_backend, get_preset
+from .deps import DependencyRegistry, default_registry
 
 @dataclass(frozen=True)
 class RecordingPlan:
     out_path: str
     ffmpeg_cmd: list[str]
+    # Written by the stream loop itself (MPEG-TS as delivered), no ffmpeg.
+    direct: bool = False
+
+# Appends the Space's MPEG-TS to a file. TS needs no header or index, so the
+# file is valid at any segment boundary and a resumed session cuts it back
+# to the last snapshotted offset and carries on.
+class StreamRecording:
+    def __init__(self, path: str, offset: int = 0):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._f = os.fdopen(fd, "r+b")
+        self._f.truncate(offset)
+        self._f.seek(offset)
+        self.offset = offset
+
+    def write(self, data: bytes) -> None:
+        self._f.write(data)
+        self.offset += len(data)
+
+    def flush(self) -> int:
+        self._f.flush()
+        return self.offset
+
+    def sync(self) -> None:
+        os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        try:
+            self._f.close()
+        except OSError:
+            pass
 
 class RecorderService:
-    def __init__(self, out_dir: str):
+    def __init__(self, out_dir: str, deps: Optional[DependencyRegistry] = None):
         self.out_dir = out_dir
+        self.deps = deps or default_registry()
+
+    def check(self, *, backend: Optional[str] = None, preset: Optional[str] = None) -> tuple[CaptureBackend, CapturePreset]:
+        # Everything a video plan can reject, without side effects.
+        grab = get_backend(backend)
+        enc = get_preset(preset)
+        ffmpeg = self.deps.info("ffmpeg")
+        devices = ffmpeg.capabilities.get("devices")
+        if ffmpeg.ok and devices and grab.name not in devices:
+            raise MissingDependency(f"This ffmpeg build cannot capture the screen with {grab.name}.")
+        return grab, enc
 
-    def plan(self, rect: WindowRect) -> RecordingPlan:
+    def plan(
+        self,
+        rect: WindowRect,
+        *,
+        video: bool = True,
+        backend: Optional[str] = None,
+        preset: Optional[str] = None,
+        direct: bool = False,
+    ) -> RecordingPlan:
         os.makedirs(self.out_dir, exist_ok=True)
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if not video and direct:
+            return RecordingPlan(os.path.join(self.out_dir, f"space_{ts}_audio.ts"), [], direct=True)
+        if not video:
+            out = os.path.join(self.out_dir, f"space_{ts}_audio.m4a")
+            cmd = [
+                "ffmpeg", "-y",
+                "-f", "mpegts", "-i", "pipe:0",
+                "-map", "0:a:0",
+                "-c:a", "copy",
+                out,
+            ]
+            return RecordingPlan(out, cmd)
+
+        grab, enc = self.check(backend=backend, preset=preset)
         out = os.path.join(self.out_dir, f"space_{ts}_{rect.width}x{rect.height}.mp4")
 
         cmd = [
             "ffmpeg", "-y",
-            "-f", "aac", "-i", "pipe:0",
-            "-f", "gdigrab",
-            "-framerate", "30",
-            "-offset_x", str(rect.x),
-            "-offset_y", str(rect.y),
-            "-video_size", f"{rect.width}x{rect.height}",
-            "-i", "desktop",
+            "-f", "mpegts", "-i", "pipe:0",
+            *grab.input_args(rect, enc.fps),
             "-map", "1:v:0", "-map", "0:a:0",
-            "-c:v", "libx264", "-preset", "veryfast",
-            "-pix_fmt", "yuv420p", "-r", "30",
+            *enc.video_args(),
             "-c:a", "aac", "-b:a", "128k",
             out,
         ]
@@ -0,0 +1,279 @@
+import json
+import os
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from ..domain.errors import StartFailed
+from .deps import DependencyRegistry, default_registry
+
+_UA = "Mozilla/5.0 (space_watcher replay)"
+
+
+@dataclass(frozen=True)
+class Fragment:
+    index: int
+    url: str
+    duration: float
+
+
+def _attrs(line: str) -> dict[str, str]:
+    out = {}
+    for part in line.split(":", 1)[1].split(","):
+        key, _, value = part.partition("=")
+        out[key.strip()] = value.strip().strip('"')
+    return out
+
+
+def parse_playlist(text: str, base_url: str) -> tuple[list[Fragment], list[tuple[int, str]]]:
+    # Returns (fragments, variants). A master playlist has only variants,
+    # as (bandwidth, url) pairs.
+    fragments: list[Fragment] = []
+    variants: list[tuple[int, str]] = []
+    duration = 0.0
+    bandwidth = None
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-STREAM-INF"):
+            bandwidth = int(_attrs(line).get("BANDWIDTH", "0") or 0)
+        elif line.startswith("#EXT-X-KEY"):
+            if _attrs(line).get("METHOD", "NONE") != "NONE":
+                raise StartFailed("Encrypted replays are not supported.")
+        elif line.startswith("#EXT-X-BYTERANGE"):
+            raise StartFailed("Byte-range playlists are not supported.")
+        elif line.startswith("#EXTINF"):
+            duration = float(line.split(":", 1)[1].split(",", 1)[0] or 0)
+        elif not line.startswith("#"):
+            url = urllib.parse.urljoin(base_url, line)
+            if bandwidth is not None:
+                variants.append((bandwidth, url))
+                bandwidth = None
+            else:
+                fragments.append(Fragment(len(fragments), url, duration))
+                duration = 0.0
+    return fragments, variants
+
+
+# Sidecar next to the .part file. Fragments are written in completion order,
+# so the map records where each one landed: index -> [offset, length]. A
+# missing entry is a hole still to fetch.
+@dataclass
+class PartState:
+    source: str
+    count: int
+    fragments: dict[int, tuple[int, int]]
+
+    @property
+    def end(self) -> int:
+        return max((o + n for o, n in self.fragments.values()), default=0)
+
+    def done(self, index: int) -> bool:
+        return index in self.fragments
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PartState"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                data["source"],
+                int(data["count"]),
+                {int(k): (int(v[0]), int(v[1])) for k, v in data["fragments"].items()},
+            )
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            return None
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "source": self.source,
+                    "count": self.count,
+                    "fragments": {str(k): list(v) for k, v in sorted(self.fragments.items())},
+                },
+                f,
+            )
+        os.replace(tmp, path)
+
+
+@dataclass
+class ReplayProgress:
+    done: int
+    total: int
+    bytes: int
+
+
+@dataclass(frozen=True)
+class ReplayResult:
+    path: str
+    fragments: int
+    bytes: int
+    resumed: int
+    seconds: float
+
+
+class ReplayDownloader:
+    def __init__(
+        self,
+        workers: int = 8,
+        retries: int = 5,
+        timeout: float = 20.0,
+        checkpoint_interval: float = 1.0,
+        deps: Optional[DependencyRegistry] = None,
+    ):
+        self.workers = workers
+        self.retries = retries
+        self.timeout = timeout
+        self.checkpoint_interval = checkpoint_interval
+        self.deps = deps or default_registry()
+
+    def resolve(self, page_url: str, *, cookies: bool = False, log=None) -> str:
+        yt = self.deps.require("yt-dlp", log=log)
+        cmd = [yt, "--get-url", "--no-warnings"]
+        cmd += ["--cookies-from-browser", "edge"] if cookies else ["--no-cookies"]
+        try:
+            proc = subprocess.run(cmd + [page_url], capture_output=True, timeout=60)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise StartFailed(f"Could not resolve the replay: {e}") from e
+        urls = proc.stdout.decode("utf-8", "replace").split()
+        if proc.returncode != 0 or not urls:
+            err = proc.stderr.decode("utf-8", "replace").strip().splitlines()
+            raise StartFailed(f"No replay available: {err[-1] if err else 'yt-dlp returned nothing'}")
+        return urls[0]
+
+    def _fetch(self, url: str) -> bytes:
+        req = urllib.request.Request(url, headers={"User-Agent": _UA})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return resp.read()
+
+    def _fetch_retrying(self, url: str, stop: threading.Event) -> bytes:
+        delay = 0.5
+        for attempt in range(self.retries + 1):
+            try:
+                return self._fetch(url)
+            except urllib.error.HTTPError as e:
+                # 4xx other than 429 will not get better by retrying.
+                if 400 <= e.code < 500 and e.code != 429 or attempt == self.retries:
+                    raise
+            except (OSError, urllib.error.URLError):
+                if attempt == self.retries:
+                    raise
+            if stop.wait(delay):
+                raise InterruptedError("Download cancelled.")
+            delay = min(delay * 2, 8.0)
+        raise AssertionError("unreachable")
+
+    def playlist(self, m3u8_url: str) -> list[Fragment]:
+        fragments, variants = parse_playlist(self._fetch(m3u8_url).decode("utf-8", "replace"), m3u8_url)
+        if not fragments and variants:
+            # Audio Spaces have a single rendition; otherwise take the best.
+            best = max(variants)[1]
+            fragments, _ = parse_playlist(self._fetch(best).decode("utf-8", "replace"), best)
+        if not fragments:
+            raise StartFailed("The replay playlist has no fragments.")
+        return fragments
+
+    def download(
+        self,
+        m3u8_url: str,
+        out_path: str,
+        *,
+        stop: Optional[threading.Event] = None,
+        progress: Optional[Callable[[ReplayProgress], None]] = None,
+        log=None,
+    ) -> ReplayResult:
+        stop = stop or threading.Event()
+        started = time.perf_counter()
+        fragments = self.playlist(m3u8_url)
+        part_path = out_path + ".part"
+        state_path = part_path + ".json"
+
+        # Signed playlist URLs change between resolves; match on the path.
+        source = urllib.parse.urlsplit(m3u8_url)._replace(query="", fragment="").geturl()
+        state = PartState.load(state_path) if os.path.exists(part_path) else None
+        if state and (state.source != source or state.count != len(fragments)):
+            if log:
+                log("Partial download is for another playlist; starting over.")
+            state = None
+        state = state or PartState(source, len(fragments), {})
+        resumed = len(state.fragments)
+        if resumed and log:
+            log(f"Resuming: {resumed}/{len(fragments)} fragments already downloaded.")
+
+        lock = threading.Lock()
+        mode = "r+b" if resumed else "wb"
+        with open(part_path, mode) as part:
+            # Drop anything written after the last checkpoint.
+            part.truncate(state.end)
+            part.seek(state.end)
+            state.save(state_path)
+            todo = [f for f in fragments if not state.done(f.index)]
+            total = len(fragments)
+            last_save = [time.monotonic()]
+            failed = threading.Event()
+
+            def fetch(frag: Fragment) -> None:
+                if stop.is_set() or failed.is_set():
+                    return
+                data = self._fetch_retrying(frag.url, stop)
+                with lock:
+                    offset = part.tell()
+                    part.write(data)
+                    state.fragments[frag.index] = (offset, len(data))
+                    now = time.monotonic()
+                    if now - last_save[0] >= self.checkpoint_interval:
+                        # Data before map: the sidecar never points past
+                        # what is on disk.
+                        part.flush()
+                        os.fsync(part.fileno())
+                        state.save(state_path)
+                        last_save[0] = now
+                    if progress:
+                        progress(ReplayProgress(len(state.fragments), total, state.end))
+
+            errors = []
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(todo) or 1))) as ex:
+                for fut in [ex.submit(fetch, f) for f in todo]:
+                    try:
+                        fut.result()
+                    except Exception as e:
+                        errors.append(e)
+                        failed.set()
+            with lock:
+                part.flush()
+                os.fsync(part.fileno())
+                state.save(state_path)
+
+        if errors or len(state.fragments) < total:
+            if errors and not isinstance(errors[0], InterruptedError):
+                raise StartFailed(f"Replay download failed: {errors[0]}") from errors[0]
+            raise StartFailed(f"Replay download stopped at {len(state.fragments)}/{total} fragments; run again to resume.")
+
+        self._assemble(part_path, out_path, state, total)
+        os.remove(state_path)
+        size = os.path.getsize(out_path)
+        return ReplayResult(out_path, total, size, resumed, time.perf_counter() - started)
+
+    def _assemble(self, part_path: str, out_path: str, state: PartState, total: int) -> None:
+        # Usually only a few fragments finish out of order; when none did,
+        # the .part file already is the result.
+        if all(state.fragments[i][0] < state.fragments[i + 1][0] for i in range(total - 1)):
+            os.replace(part_path, out_path)
+            return
+        tmp = out_path + ".tmp"
+        with open(part_path, "rb") as src, open(tmp, "wb") as dst:
+            for i in range(total):
+                offset, length = state.fragments[i]
+                src.seek(offset)
+                dst.write(src.read(length))
+        os.replace(tmp, out_path)
+        os.remove(part_path)
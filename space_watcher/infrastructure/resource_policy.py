@@ -0,0 +1,140 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable
+
+ALLOW = "allow"
+BLOCK = "block"
+STUB = "stub"
+
+# The Space page only needs the app shell, its API calls and the periscope
+# audio/metadata endpoints. Everything below is either heavy or telemetry.
+DEFAULT_ALLOW_PATTERNS = (
+    "*://*.pscp.tv/*",
+    "*://*.periscope.tv/*",
+    "*/i/api/graphql/*AudioSpace*",
+    "*/i/api/1.1/live_video_stream/*",
+)
+DEFAULT_BLOCK_PATTERNS = (
+    "*://video.twimg.com/*",
+    "*://pbs.twimg.com/media/*",
+    "*://pbs.twimg.com/ext_tw_video_thumb/*",
+    "*://pbs.twimg.com/amplify_video_thumb/*",
+    "*://pbs.twimg.com/tweet_video_thumb/*",
+    "*://pbs.twimg.com/card_img/*",
+    "*://pbs.twimg.com/profile_banners/*",
+    "*://*.google-analytics.com/*",
+    "*://*.googletagmanager.com/*",
+    "*://*.doubleclick.net/*",
+    "*://*.ads-twitter.com/*",
+    "*://*.scorecardresearch.com/*",
+)
+# Telemetry endpoints are answered with an empty 204 so the app does not retry.
+DEFAULT_STUB_PATTERNS = (
+    "*/1.1/jot/*",
+    "*/i/api/1.1/jot/*",
+    "*://analytics.twitter.com/*",
+    "*://analytics.x.com/*",
+)
+
+# Blocked requests never reach the network, so their size is estimated.
+_TYPICAL_BYTES = {
+    "media": 512_000,
+    "image": 80_000,
+    "font": 40_000,
+    "script": 60_000,
+    "stylesheet": 20_000,
+    "xhr": 2_000,
+    "fetch": 2_000,
+    "ping": 500,
+}
+_DEFAULT_BYTES = 4_000
+
+
+def _glob_to_regex(pattern: str) -> str:
+    # Kept JS-compatible: the route regex is evaluated by the Playwright driver.
+    return "^" + ".*".join(re.escape(part) for part in pattern.split("*")) + "$"
+
+
+def _compile(patterns: Iterable[str]) -> re.Pattern | None:
+    parts = [_glob_to_regex(p) for p in patterns]
+    if not parts:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in parts))
+
+
+@dataclass
+class ResourceStats:
+    blocked_requests: int = 0
+    stubbed_requests: int = 0
+    blocked_bytes: int = 0
+    by_type: dict[str, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, action: str, resource_type: str) -> None:
+        with self.lock:
+            if action == STUB:
+                self.stubbed_requests += 1
+            else:
+                self.blocked_requests += 1
+            self.blocked_bytes += _TYPICAL_BYTES.get(resource_type, _DEFAULT_BYTES)
+            self.by_type[resource_type] = self.by_type.get(resource_type, 0) + 1
+
+    def summary(self) -> str:
+        with self.lock:
+            total = self.blocked_requests + self.stubbed_requests
+            kib = self.blocked_bytes // 1024
+        return f"Blocked {total} requests (~{kib} KiB)."
+
+
+@dataclass(frozen=True)
+class ResourcePolicy:
+    blocked_types: frozenset[str] = frozenset()
+    block_patterns: tuple[str, ...] = DEFAULT_BLOCK_PATTERNS
+    stub_patterns: tuple[str, ...] = DEFAULT_STUB_PATTERNS
+    allow_patterns: tuple[str, ...] = DEFAULT_ALLOW_PATTERNS
+
+    def __post_init__(self):
+        object.__setattr__(self, "_allow_re", _compile(self.allow_patterns))
+        object.__setattr__(self, "_block_re", _compile(self.block_patterns))
+        object.__setattr__(self, "_stub_re", _compile(self.stub_patterns))
+
+    def decide(self, resource_type: str, url: str) -> str:
+        if self._allow_re and self._allow_re.match(url):
+            return ALLOW
+        if self._stub_re and self._stub_re.match(url):
+            return STUB
+        if resource_type in self.blocked_types:
+            return BLOCK
+        if self._block_re and self._block_re.match(url):
+            return BLOCK
+        return ALLOW
+
+    def route_matcher(self):
+        # Resource types are only known per request, so they need a catch-all
+        # route. URL patterns alone let the driver skip everything else.
+        if self.blocked_types:
+            return "**/*"
+        return _compile(tuple(self.block_patterns) + tuple(self.stub_patterns))
+
+    def install(self, context, stats: ResourceStats) -> None:
+        matcher = self.route_matcher()
+        if matcher is None:
+            return
+
+        def handle(route, request):
+            action = self.decide(request.resource_type, request.url)
+            if action == ALLOW:
+                route.continue_()
+                return
+            stats.record(action, request.resource_type)
+            if action == STUB:
+                route.fulfill(status=204, body="")
+            else:
+                route.abort("blockedbyclient")
+
+        context.route(matcher, handle)
+
+
+def default_policy() -> ResourcePolicy:
+    return ResourcePolicy()
@@ -1,46 +1,121 @@
+import dataclasses
 import os
+import threading
 import time
-from dataclasses import dataclass
+import uuid
+from dataclasses import dataclass, field
 from typing import Optional
+from ..domain.errors import DomainError
 from ..domain.models import SpaceUrl, RunOptions
 from .browser_automation import BrowserAutomationService, BrowserRuntime
 from .edge_launcher import EdgeLauncher, EdgeLaunchConfig
+from .hls_live import LivePosition
+from .live_latency import LatencyEstimate
 from .audio_stream import AudioStreamService, AudioHandles
-from .recorder import RecorderService
+from .proc_stats import total_rss_bytes
+from .recorder import RecorderService, RecordingPlan, StreamRecording
+from .session_snapshot import RecordingSegment, SessionSnapshot, SnapshotStore
+from .storage import Allocation, StorageManager
 
 @dataclass
 class SessionRuntime:
     audio: Optional[AudioHandles]
     recording_path: Optional[str]
     browser: Optional[BrowserRuntime]
+    startup_seconds: float = 0.0
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    allocation: Optional[Allocation] = None
+    snapshot: Optional[SessionSnapshot] = None
 
 class SessionOrchestrator:
-    def __init__(self, out_dir: str):
+    def __init__(
+        self,
+        out_dir: str,
+        storage: Optional[StorageManager] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        snapshot_interval: float = 2.0,
+    ):
         self.audio = AudioStreamService()
         self.recorder = RecorderService(out_dir)
+        self.storage = storage or StorageManager(out_dir)
         self.browser = BrowserAutomationService()
+        self.snapshots = snapshots or SnapshotStore()
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        # Serializes snapshot writes with the delete on stop.
+        self._save_lock = threading.Lock()
+        self._resumable: dict[str, SessionRuntime] = {}
+        self._snap_stop = threading.Event()
+        self._snap_thread: Optional[threading.Thread] = None
 
-    def start(self, space: SpaceUrl, opts: RunOptions, log):
-        browser_rt = self.browser.start(space.value, opts, log)
-        if browser_rt is None:
-            EdgeLauncher.open_mobile_like(
-                EdgeLaunchConfig(
-                    space.value,
-                    opts.mobile_user_agent,
-                    opts.rect.width,
-                    opts.rect.height,
-                    opts.rect.x,
-                    opts.rect.y,
-                )
-            )
-            time.sleep(3)
-        else:
-            if browser_rt.ready:
-                browser_rt.ready.wait(timeout=15)
+    def start(self, space: SpaceUrl, opts: RunOptions, log, resume: Optional[SessionSnapshot] = None):
+        started = time.perf_counter()
+        if opts.resumable and resume is None:
+            # Same Space as a session that did not stop cleanly: pick it up.
+            resume = self.snapshots.find(space.space_id)
+        if resume is not None and self._running(resume.session_id):
+            resume = None
+        session_id = resume.session_id if resume else uuid.uuid4().hex[:8]
+        if resume and log:
+            at = f" after media sequence {resume.media_sequence}" if resume.media_sequence is not None else ""
+            log(f"Resuming session {session_id}{at}.")
+        admission = None
+        if opts.record:
+            # Before anything starts, so a full disk or a capture setting
+            # ffmpeg cannot do is reported right away.
+            if opts.ui:
+                self.recorder.check(backend=opts.capture_backend, preset=opts.capture_preset)
+            # Eviction must spare every file a snapshot will append to or
+            # list, this session's included: none of them is begun yet.
+            keep = [seg.path for snap in self.snapshots.load_all() for seg in snap.segments]
+            if resume:
+                keep += [seg.path for seg in resume.segments]
+            admission = self.storage.admit(video=opts.ui, keep=keep)
+
+        segments = list(resume.segments) if resume else []
+        direct = opts.resumable and not opts.ui
+        rec, alloc, recording, browser_rt = None, None, None, None
+        created = None
+        last = segments[-1] if segments else None
 
-        rec = self.recorder.plan(opts.rect) if opts.record else None
+        position = None
+        if opts.resumable:
+            position = LivePosition()
+            if resume:
+                position.playlist_url = resume.playlist_url
+                position.auth = resume.auth
 
         try:
+            browser_rt = self._start_ui(space, opts, log, session_id) if opts.ui else None
+            if opts.record and direct and last and last.bytes is not None and os.path.exists(last.path):
+                # Cut back to what the snapshot vouches for, then append.
+                rec = RecordingPlan(last.path, [], direct=True)
+                offset = min(last.bytes, os.path.getsize(last.path))
+                if offset < last.bytes and log:
+                    log(f"Recording is {last.bytes - offset} bytes shorter than its snapshot; audio will have a gap.")
+                # Truncate before reserving: ftruncate frees blocks kept past EOF.
+                recording = StreamRecording(rec.out_path, offset)
+                alloc = self.storage.begin(rec.out_path, video=False, append=True, admission=admission)
+            elif opts.record:
+                rec = self.recorder.plan(
+                    opts.rect,
+                    video=opts.ui,
+                    backend=opts.capture_backend,
+                    preset=opts.capture_preset,
+                    direct=direct,
+                )
+                created = rec.out_path
+                if rec.direct:
+                    recording = StreamRecording(rec.out_path)
+                alloc = self.storage.begin(rec.out_path, video=opts.ui, append=rec.direct, admission=admission)
+                if not rec.direct and alloc.preallocated:
+                    # ffmpeg would otherwise truncate away the reserved blocks.
+                    rec = RecordingPlan(rec.out_path, rec.ffmpeg_cmd[:-1] + ["-truncate", "0", rec.out_path])
+                segments.append(RecordingSegment(rec.out_path, 0 if rec.direct else None))
+            if position and resume and recording:
+                # Listening only: rejoin at the live edge, not where we left.
+                position.sequence = resume.media_sequence
+
             audio = self.audio.start(
                 url=space.value,
                 record=opts.record,
@@ -48,16 +123,176 @@ class SessionOrchestrator:
                 guest=opts.try_guest_first,
                 cookies=opts.allow_cookies_fallback,
                 log=log,
+                relay_port=opts.relay_port,
+                relay_host=opts.relay_host,
+                session_id=session_id,
+                catch_up=opts.catch_up,
+                audio_output=opts.audio_output,
+                position=position,
+                recording=recording,
             )
         except Exception:
+            if recording:
+                recording.close()
+            self.storage.end(alloc or admission)
+            if created:
+                # Nothing was recorded into it.
+                try:
+                    os.remove(created)
+                except OSError:
+                    pass
             self.browser.stop(browser_rt)
             raise
 
-        return SessionRuntime(audio, rec.out_path if rec else None, browser_rt)
+        rt = SessionRuntime(audio, rec.out_path if rec else None, browser_rt, session_id=session_id, allocation=alloc)
+        rt.startup_seconds = time.perf_counter() - started
+        if opts.resumable:
+            rt.snapshot = SessionSnapshot(
+                session_id,
+                space.value,
+                space.space_id,
+                dataclasses.asdict(opts),
+                segments=segments,
+                started_at=resume.started_at if resume else time.time(),
+            )
+            self._track(rt)
+        if log and not opts.ui:
+            log(f"Audio-only session started in {rt.startup_seconds:.2f} s.")
+        return rt
+
+    def resume_all(self, log) -> list[SessionRuntime]:
+        # Sessions left behind by a crash or a reboot.
+        runtimes = []
+        for snap in self.snapshots.load_all():
+            if self._running(snap.session_id):
+                continue
+            try:
+                rt = self.start(SpaceUrl(snap.space_url), snap.run_options(), log, resume=snap)
+            except (DomainError, OSError, TypeError, KeyError) as e:
+                if log:
+                    log(f"Could not resume {snap.space_url}: {e}")
+                continue
+            runtimes.append(rt)
+        return runtimes
+
+    def _running(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._resumable
+
+    def _track(self, rt: SessionRuntime) -> None:
+        with self._lock:
+            self._resumable[rt.session_id] = rt
+            if self._snap_thread is None:
+                self._snap_thread = threading.Thread(target=self._snapshot_loop, name="snapshots", daemon=True)
+                self._snap_thread.start()
+        self._write_snapshot(rt)
+
+    def _snapshot_loop(self) -> None:
+        while True:
+            self._snap_stop.wait(self.snapshot_interval)
+            with self._lock:
+                self._snap_stop.clear()
+                runtimes = list(self._resumable.values())
+                if not runtimes:
+                    self._snap_thread = None
+                    return
+            for rt in runtimes:
+                self._write_snapshot(rt)
+
+    def _write_snapshot(self, rt: SessionRuntime) -> None:
+        h, snap = rt.audio, rt.snapshot
+        if not h or not snap:
+            return
+        with self._save_lock:
+            if not self._running(rt.session_id):
+                return
+            if h.ended:
+                self._finish(rt)
+                return
+            with h.record_lock:
+                if h.stop.is_set() or h.record_failed:
+                    # After a failed write the last saved snapshot is the
+                    # last one that matches the file.
+                    return
+                pos = h.position
+                recording = h.recording
+                if recording:
+                    try:
+                        snap.segments[-1].bytes = recording.flush()
+                    except OSError:
+                        return
+                snap.auth = pos.auth
+                snap.playlist_url = pos.playlist_url
+                snap.media_sequence = pos.sequence
+            try:
+                if recording:
+                    # Data before the snapshot that points at it.
+                    recording.sync()
+                self.snapshots.save(snap)
+            except (OSError, ValueError):
+                pass
+
+    def _finish(self, rt: SessionRuntime) -> None:
+        # The Space is over. Re-resolving it could return the replay, whose
+        # sequence numbers do not match the live ones, so it must never be
+        # resumed: make the recording durable and drop the snapshot.
+        h = rt.audio
+        with self._lock:
+            self._resumable.pop(rt.session_id, None)
+        with h.record_lock:
+            recording = h.recording
+            try:
+                if recording:
+                    recording.flush()
+                    recording.sync()
+            except (OSError, ValueError):
+                pass
+        self.snapshots.remove(rt.session_id)
+
+    def _start_ui(self, space: SpaceUrl, opts: RunOptions, log, session_id: str) -> Optional[BrowserRuntime]:
+        browser_rt = self.browser.start(space.value, opts, log, session_id=session_id)
+        if browser_rt is None:
+            EdgeLauncher.open_mobile_like(
+                EdgeLaunchConfig(
+                    space.value,
+                    opts.mobile_user_agent,
+                    opts.rect.width,
+                    opts.rect.height,
+                    opts.rect.x,
+                    opts.rect.y,
+                )
+            )
+            time.sleep(3)
+        else:
+            if browser_rt.ready:
+                browser_rt.ready.wait(timeout=15)
+        return browser_rt
 
     def stop(self, rt: SessionRuntime):
+        with self._lock:
+            self._resumable.pop(rt.session_id, None)
+            if not self._resumable:
+                self._snap_stop.set()
+        if rt.snapshot:
+            # A clean stop: nothing to resume.
+            with self._save_lock:
+                self.snapshots.remove(rt.session_id)
         self.audio.stop(rt.audio)
+        self.storage.end(rt.allocation)
         self.browser.stop(rt.browser)
 
     def toggle_mute(self, rt: SessionRuntime) -> bool:
         return self.audio.toggle_mute(rt.audio)
+
+    def rss_bytes(self, rt: SessionRuntime) -> Optional[int]:
+        # Child processes only; the browser is shared between sessions.
+        h = rt.audio
+        if not h:
+            return None
+        return total_rss_bytes(p.pid for p in (h.yt, h.mpv, h.ffmpeg) if p)
+
+    def latency(self, rt: SessionRuntime) -> Optional[LatencyEstimate]:
+        h = rt.audio
+        if not h or not h.latency:
+            return None
+        return h.latency.latest
@@ -0,0 +1,107 @@
+import dataclasses
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ..domain.models import RunOptions, WindowRect
+from .deps import cache_dir
+
+SNAPSHOT_VERSION = 1
+
+
+# One file of a session's recording. `bytes` is the durable length of a
+# direct (MPEG-TS) recording at snapshot time; None for ffmpeg-written files,
+# which are only complete once ffmpeg exits.
+@dataclass
+class RecordingSegment:
+    path: str
+    bytes: Optional[int] = None
+
+
+@dataclass
+class SessionSnapshot:
+    session_id: str
+    space_url: str
+    space_id: str
+    options: dict
+    auth: Optional[str] = None
+    playlist_url: Optional[str] = None
+    media_sequence: Optional[int] = None
+    segments: list[RecordingSegment] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def run_options(self) -> RunOptions:
+        known = {f.name for f in dataclasses.fields(RunOptions)}
+        opts = {k: v for k, v in self.options.items() if k in known}
+        opts["rect"] = WindowRect(**opts["rect"])
+        return RunOptions(**opts)
+
+    def to_dict(self) -> dict:
+        data = dataclasses.asdict(self)
+        data["version"] = SNAPSHOT_VERSION
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionSnapshot":
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError("unknown snapshot version")
+        data = {k: v for k, v in data.items() if k != "version"}
+        data["segments"] = [RecordingSegment(**s) for s in data.get("segments") or []]
+        return cls(**data)
+
+
+# One JSON file per running session, replaced atomically. A clean stop
+# deletes it; whatever is left after a crash is what can be resumed.
+class SnapshotStore:
+    def __init__(self, directory: Optional[str] = None, max_age: float = 6 * 3600):
+        self.directory = directory or os.path.join(cache_dir(), "sessions")
+        self.max_age = max_age
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"session_{session_id}.json")
+
+    def save(self, snap: SessionSnapshot) -> None:
+        snap.updated_at = time.time()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(snap.session_id)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snap.to_dict(), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def remove(self, session_id: str) -> None:
+        try:
+            os.remove(self._path(session_id))
+        except OSError:
+            pass
+
+    def load_all(self) -> list[SessionSnapshot]:
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return []
+        out = []
+        for name in names:
+            if not (name.startswith("session_") and name.endswith(".json")):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    snap = SessionSnapshot.from_dict(json.load(f))
+            except (OSError, ValueError, TypeError, KeyError):
+                continue
+            if time.time() - snap.updated_at > self.max_age:
+                # The Space is long over; its recording stays where it is.
+                self.remove(snap.session_id)
+                continue
+            out.append(snap)
+        return out
+
+    def find(self, space_id: str) -> Optional[SessionSnapshot]:
+        found = [s for s in self.load_all() if s.space_id == space_id]
+        return max(found, key=lambda s: s.updated_at) if found else None
@@ -0,0 +1,299 @@
+import ctypes
+import ctypes.util
+import os
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from ..domain.errors import InsufficientStorage
+from .deps import DependencyRegistry, default_registry
+from .proc_stats import disk_free_bytes
+
+GIB = 1024 ** 3
+MIB = 1024 ** 2
+RECORDING_EXTS = (".mp4", ".m4a", ".ts")
+FALLOC_FL_KEEP_SIZE = 0x01
+
+EVICT_NONE = "none"
+EVICT_DELETE = "delete"
+# Old video recordings are cut down to their audio track (stream copy).
+EVICT_COMPRESS = "compress"
+
+
+@dataclass(frozen=True)
+class StoragePolicy:
+    quota_bytes: Optional[int] = None
+    min_free_bytes: int = 1 * GIB
+    reserve_video_bytes: int = 1 * GIB
+    reserve_audio_bytes: int = 128 * MIB
+    chunk_bytes: int = 64 * MIB
+    evict: str = EVICT_NONE
+    check_interval: float = 10.0
+
+
+_libc = None
+
+
+def _fmt(n: int) -> str:
+    return f"{n / GIB:.1f} GiB" if n >= GIB else f"{n / MIB:.0f} MiB"
+
+
+def _fallocate(fd: int, offset: int, length: int) -> bool:
+    # Reserve blocks past EOF without changing the file size, so the writer
+    # (ffmpeg) still sees a normal growing file. Linux only.
+    global _libc
+    if not sys.platform.startswith("linux"):
+        return False
+    if _libc is None:
+        try:
+            _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            _libc.fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+        except (OSError, AttributeError):
+            _libc = False
+    if not _libc:
+        return False
+    return _libc.fallocate(fd, FALLOC_FL_KEEP_SIZE, offset, length) == 0
+
+
+@dataclass
+class Allocation:
+    path: str
+    reserved: int = 0
+    preallocated: bool = False
+
+
+@dataclass
+class StorageUsage:
+    used_bytes: int
+    free_bytes: Optional[int]
+    quota_bytes: Optional[int]
+    recordings: int
+    active: int = 0
+
+
+@dataclass
+class _Entry:
+    path: str
+    size: int
+    mtime: float
+
+
+class StorageManager:
+    def __init__(
+        self,
+        out_dir: str,
+        policy: Optional[StoragePolicy] = None,
+        deps: Optional[DependencyRegistry] = None,
+        log=None,
+    ):
+        self.out_dir = out_dir
+        self.policy = policy or StoragePolicy()
+        self.deps = deps or default_registry()
+        self.log = log
+        self._lock = threading.Lock()
+        # Held from the free-space check until the admission is recorded, so
+        # concurrent starts cannot all count the same free space.
+        self._admit_lock = threading.Lock()
+        self._active: dict[str, Allocation] = {}
+        self._admitted: list[Allocation] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _recordings(self) -> list[_Entry]:
+        out = []
+        try:
+            it = os.scandir(self.out_dir)
+        except OSError:
+            return out
+        with it:
+            for e in it:
+                if not e.name.endswith(RECORDING_EXTS) or not e.is_file():
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                # Allocated blocks, so preallocation counts against the quota.
+                size = getattr(st, "st_blocks", 0) * 512 or st.st_size
+                out.append(_Entry(e.path, size, st.st_mtime))
+        return out
+
+    def usage(self) -> StorageUsage:
+        recs = self._recordings()
+        with self._lock:
+            active = len(self._active)
+        return StorageUsage(
+            used_bytes=sum(r.size for r in recs),
+            free_bytes=disk_free_bytes(self.out_dir),
+            quota_bytes=self.policy.quota_bytes,
+            recordings=len(recs),
+            active=active,
+        )
+
+    def _shortfall(self, need: int) -> tuple[int, str]:
+        p = self.policy
+        u = self.usage()
+        with self._lock:
+            pending = sum(max(0, a.reserved - _size(a.path)) for a in self._active.values())
+            pending += sum(a.reserved for a in self._admitted)
+        short, reason = 0, ""
+        if u.free_bytes is not None:
+            missing = p.min_free_bytes + need + pending - u.free_bytes
+            if missing > 0:
+                short = missing
+                reason = f"only {_fmt(u.free_bytes)} free in {self.out_dir}"
+        if p.quota_bytes is not None:
+            missing = u.used_bytes + need + pending - p.quota_bytes
+            if missing > short:
+                short = missing
+                reason = f"{_fmt(u.used_bytes)} of the {_fmt(p.quota_bytes)} quota used in {self.out_dir}"
+        return short, reason
+
+    def admit(self, *, video: bool, keep: Iterable[str] = ()) -> Allocation:
+        # Called before a recording starts; evicts if allowed and raises
+        # rather than letting ffmpeg run out of space mid-Space. The space
+        # stays reserved until begin() takes it over or end() releases it.
+        # `keep`: files not yet begun that must survive eviction (recordings
+        # of resumable sessions).
+        need = self.policy.reserve_video_bytes if video else self.policy.reserve_audio_bytes
+        with self._admit_lock:
+            short, reason = self._shortfall(need)
+            if short > 0 and self.policy.evict != EVICT_NONE:
+                self.evict(short, keep=keep)
+                short, reason = self._shortfall(need)
+            if short > 0:
+                raise InsufficientStorage(
+                    f"Not enough space to record: {reason}; a new recording needs {_fmt(need)}."
+                )
+            admission = Allocation("", reserved=need)
+            with self._lock:
+                self._admitted.append(admission)
+        return admission
+
+    def evict(self, need: int, keep: Iterable[str] = ()) -> int:
+        with self._lock:
+            protected = {os.path.abspath(p) for p in self._active}
+        protected.update(os.path.abspath(p) for p in keep)
+        freed = 0
+        candidates = sorted(
+            (r for r in self._recordings() if os.path.abspath(r.path) not in protected),
+            key=lambda r: r.mtime,
+        )
+        for r in candidates:
+            if freed >= need:
+                break
+            if self.policy.evict == EVICT_COMPRESS:
+                if not r.path.endswith(".mp4"):
+                    continue
+                freed += self._strip_video(r)
+            elif self.policy.evict == EVICT_DELETE:
+                try:
+                    os.remove(r.path)
+                except OSError:
+                    continue
+                freed += r.size
+                if self.log:
+                    self.log(f"Deleted old recording {os.path.basename(r.path)} to free space.")
+        return freed
+
+    def _strip_video(self, r: _Entry) -> int:
+        out = os.path.splitext(r.path)[0] + "_audio.m4a"
+        try:
+            ffmpeg = self.deps.require("ffmpeg")
+            subprocess.run(
+                [ffmpeg, "-y", "-v", "error", "-i", r.path, "-vn", "-c:a", "copy", out],
+                check=True,
+                capture_output=True,
+                timeout=600,
+            )
+            os.utime(out, (r.mtime, r.mtime))
+            os.remove(r.path)
+        except Exception:
+            if os.path.exists(out):
+                os.remove(out)
+            return 0
+        if self.log:
+            self.log(f"Kept only the audio of old recording {os.path.basename(r.path)}.")
+        return max(0, r.size - _size(out))
+
+    def begin(
+        self,
+        path: str,
+        *,
+        video: bool,
+        append: bool = False,
+        admission: Optional[Allocation] = None,
+    ) -> Allocation:
+        # append: a resumed recording; keep what is already there.
+        reserve = self.policy.reserve_video_bytes if video else self.policy.reserve_audio_bytes
+        alloc = Allocation(path, reserved=reserve)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "ab" if append else "wb") as f:
+            start = f.tell()
+            alloc.reserved += start
+            alloc.preallocated = _fallocate(f.fileno(), start, min(self.policy.chunk_bytes, reserve))
+        with self._lock:
+            self._release(admission)
+            self._active[path] = alloc
+            if alloc.preallocated and self._thread is None:
+                self._thread = threading.Thread(target=self._extend_loop, name="storage", daemon=True)
+                self._thread.start()
+        return alloc
+
+    def _release(self, admission: Optional[Allocation]) -> None:
+        if admission is not None:
+            self._admitted = [a for a in self._admitted if a is not admission]
+
+    def end(self, alloc: Optional[Allocation]) -> None:
+        # Also takes an admission that never got to begin().
+        if not alloc:
+            return
+        with self._lock:
+            if not alloc.path:
+                self._release(alloc)
+                return
+            self._active.pop(alloc.path, None)
+            if not self._active:
+                self._stop.set()
+        # Give back whatever was reserved past EOF (a no-op otherwise).
+        try:
+            os.truncate(alloc.path, os.path.getsize(alloc.path))
+        except OSError:
+            pass
+
+    def _extend_loop(self) -> None:
+        # Keep one chunk allocated ahead of each growing recording.
+        chunk = self.policy.chunk_bytes
+        while True:
+            self._stop.wait(self.policy.check_interval)
+            with self._lock:
+                self._stop.clear()
+                allocs = [a for a in self._active.values() if a.preallocated]
+                if not allocs:
+                    self._thread = None
+                    return
+            for a in allocs:
+                try:
+                    st = os.stat(a.path)
+                    if st.st_blocks * 512 - st.st_size >= chunk // 2:
+                        continue
+                    fd = os.open(a.path, os.O_WRONLY)
+                except OSError:
+                    continue
+                try:
+                    ok = _fallocate(fd, st.st_size, chunk)
+                finally:
+                    os.close(fd)
+                if not ok:
+                    a.preallocated = False
+                    if self.log:
+                        self.log(f"Could not reserve more space for {os.path.basename(a.path)}.")
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,129 @@
+import queue
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+STREAM_PATH = "/stream.ts"
+
+
+@dataclass
+class RelayClient:
+    address: str
+    backlog: queue.Queue
+    dropped: threading.Event = field(default_factory=threading.Event)
+    bytes_sent: int = 0
+
+
+# Re-serves the upstream MPEG-TS to local listeners over chunked HTTP.
+# publish() never blocks: a client whose backlog is full is disconnected
+# instead of slowing yt-dlp down for everyone else.
+class StreamRelay:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        max_backlog: int = 256,
+        send_timeout: float = 5.0,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self.max_backlog = max_backlog
+        self.send_timeout = send_timeout
+        self.log = log
+        self._clients: list[RelayClient] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{STREAM_PATH}"
+
+    def start(self) -> "StreamRelay":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for c in clients:
+            c.dropped.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def publish(self, data: bytes) -> None:
+        with self._lock:
+            clients = list(self._clients)
+        for c in clients:
+            if c.dropped.is_set():
+                continue
+            try:
+                c.backlog.put_nowait(data)
+            except queue.Full:
+                c.dropped.set()
+                self._remove(c)
+                if self.log:
+                    self.log(f"Relay client {c.address} too slow; disconnected.")
+
+    def _add(self, client: RelayClient) -> None:
+        with self._lock:
+            self._clients.append(client)
+
+    def _remove(self, client: RelayClient) -> None:
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def _handler_class(self):
+        relay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Socket timeout for reads and writes: a client that stops
+            # reading fails its write here instead of blocking forever.
+            timeout = relay.send_timeout
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != STREAM_PATH:
+                    self.send_error(404)
+                    return
+                client = RelayClient(
+                    address=f"{self.client_address[0]}:{self.client_address[1]}",
+                    backlog=queue.Queue(maxsize=relay.max_backlog),
+                )
+                self.send_response(200)
+                self.send_header("Content-Type", "video/mp2t")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                relay._add(client)
+                try:
+                    while not client.dropped.is_set():
+                        try:
+                            data = client.backlog.get(timeout=1.0)
+                        except queue.Empty:
+                            continue
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                        client.bytes_sent += len(data)
+                    self.close_connection = True
+                except TimeoutError:
+                    self.close_connection = True
+                    if relay.log:
+                        relay.log(f"Relay client {client.address} stopped reading; disconnected.")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    relay._remove(client)
+
+            def log_message(self, *_args):
+                pass
+
+        return Handler
@@ -1,12 +1,21 @@
+import sys
+
 from space_watcher.infrastructure.error_log import log_error
-from space_watcher.presentation.gui import run_gui
+from space_watcher.infrastructure.profiling import install_profiling_hooks
 
-def main():
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
     try:
+        if not argv or argv[0] != "ctl":
+            install_profiling_hooks()
+        if argv:
+            from space_watcher.presentation.cli import run_cli
+            return run_cli(argv)
+        from space_watcher.presentation.gui import run_gui
         run_gui()
     except Exception as e:
         log_error(e, context="main")
         raise
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,310 @@
+import argparse
+import json
+import socket
+import threading
+
+from ..application.cluster import Coordinator, RecordingWorker
+from ..application.use_cases import (
+    DownloadReplayUseCase,
+    ResumeSessionsUseCase,
+    StartSessionUseCase,
+    StopSessionUseCase,
+)
+from ..application.watchlist import SchedulerConfig, WatchlistScheduler, load_watchlist
+from ..domain.errors import DomainError
+from ..domain.models import RunOptions, SpaceUrl
+from ..infrastructure.deps import default_registry
+from ..infrastructure.audio_output import default_selector
+from ..infrastructure.capture import CAPTURE_BACKENDS, CAPTURE_PRESETS
+from ..infrastructure.live_status import HttpStatusSource, YtDlpStatusSource
+from ..infrastructure.replay_download import ReplayDownloader
+from ..infrastructure.session_runtime import SessionOrchestrator
+from ..infrastructure.storage import EVICT_COMPRESS, EVICT_DELETE, EVICT_NONE, GIB, StorageManager, StoragePolicy
+from .defaults import OUT, RECT, UA
+
+
+def _log(m: str) -> None:
+    print(m, flush=True)
+
+
+def _wait_forever() -> None:
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+def _check_deps(args) -> bool:
+    # Probe everything up front so a broken binary fails here, not when the
+    # first Space goes live.
+    names = ("yt-dlp", "mpv", "ffmpeg") if args.record else ("yt-dlp", "mpv")
+    ok = True
+    for name, info in default_registry().warm(names).items():
+        if not info.ok:
+            _log(f"{name}: {info.error}")
+            ok = False
+    if ok:
+        default_selector().select(args.audio_output, log=_log)
+    return ok
+
+
+def _orchestrator(args) -> SessionOrchestrator:
+    policy = StoragePolicy(
+        quota_bytes=int(args.quota_gb * GIB) if args.quota_gb else None,
+        min_free_bytes=int(args.min_free_gb * GIB),
+        evict=args.evict,
+    )
+    return SessionOrchestrator(args.out, StorageManager(args.out, policy, log=_log))
+
+
+def _add_storage_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--quota-gb", type=float, help="Cap on recordings kept in --out.")
+    p.add_argument("--min-free-gb", type=float, default=StoragePolicy.min_free_bytes / GIB)
+    p.add_argument(
+        "--evict",
+        choices=[EVICT_NONE, EVICT_DELETE, EVICT_COMPRESS],
+        default=EVICT_NONE,
+        help="What to do with the oldest recordings when space runs low.",
+    )
+
+
+def _add_capture_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--capture-backend", choices=sorted(CAPTURE_BACKENDS), help="Default: gdigrab on Windows, x11grab on Linux.")
+    p.add_argument("--capture-preset", choices=list(CAPTURE_PRESETS), default="standard")
+
+
+def _add_audio_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--audio-output",
+        help="mpv audio output (e.g. pulse, alsa, wasapi); 'null' never opens a device. Default: auto.",
+    )
+
+
+def _add_resume_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--resumable",
+        action="store_true",
+        help="Snapshot each session so a restart continues the same recording (see 'resume').",
+    )
+
+
+def _run_watch(args) -> int:
+    if not _check_deps(args):
+        return 1
+    orch = _orchestrator(args)
+    opts = RunOptions(
+        RECT,
+        UA,
+        args.record,
+        allow_cookies_fallback=False,
+        ui=args.ui,
+        capture_backend=args.capture_backend,
+        capture_preset=args.capture_preset,
+        audio_output=args.audio_output,
+        resumable=args.resumable,
+    )
+    source = HttpStatusSource(args.status_url) if args.status_url else YtDlpStatusSource()
+    config = SchedulerConfig(
+        max_sessions=args.max_sessions,
+        batch_size=args.batch_size,
+        min_interval=args.min_interval,
+        max_interval=args.max_interval,
+    )
+    scheduler = WatchlistScheduler(
+        StartSessionUseCase(orch), StopSessionUseCase(orch), source, opts, config, log=_log
+    )
+    keys = load_watchlist(args.watchlist)
+    scheduler.set_watchlist(keys)
+    _log(f"Watching {len(keys)} entries. Press Ctrl+C to stop.")
+    scheduler.start()
+    _wait_forever()
+    scheduler.stop()
+    return 0
+
+
+def _address(value: str) -> tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def _run_resume(args) -> int:
+    if not _check_deps(args):
+        return 1
+    orch = _orchestrator(args)
+    runtimes = ResumeSessionsUseCase(orch).execute(_log).runtimes
+    if not runtimes:
+        _log("No interrupted sessions to resume.")
+        return 0
+    _log(f"Resumed {len(runtimes)} session(s). Press Ctrl+C to stop.")
+    _wait_forever()
+    stop = StopSessionUseCase(orch)
+    for rt in runtimes:
+        stop.execute(rt)
+    return 0
+
+
+def _run_coordinator(args) -> int:
+    host, port = _address(args.listen)
+    coord = Coordinator(host, port, log=_log).start()
+    _log(f"Coordinator listening on {coord.address[0]}:{coord.address[1]}")
+    if args.spaces:
+        for url in load_watchlist(args.spaces):
+            coord.submit(url)
+    _wait_forever()
+    coord.stop()
+    return 0
+
+
+def _run_worker(args) -> int:
+    if not _check_deps(args):
+        return 1
+    orch = _orchestrator(args)
+    opts = RunOptions(
+        RECT,
+        UA,
+        args.record,
+        allow_cookies_fallback=False,
+        ui=args.ui,
+        capture_backend=args.capture_backend,
+        capture_preset=args.capture_preset,
+        audio_output=args.audio_output,
+        resumable=args.resumable,
+    )
+    worker = RecordingWorker(
+        _address(args.coordinator),
+        StartSessionUseCase(orch),
+        StopSessionUseCase(orch),
+        opts,
+        out_dir=args.out,
+        max_sessions=args.max_sessions,
+        log=_log,
+    ).start()
+    _log(f"Worker {worker.worker_id} connecting to {args.coordinator}")
+    _wait_forever()
+    worker.stop()
+    return 0
+
+
+def _run_submit(args) -> int:
+    with socket.create_connection(_address(args.coordinator), timeout=10) as sock:
+        f = sock.makefile("rw", encoding="utf-8", newline="\n")
+        for url in args.urls:
+            f.write(json.dumps({"type": "submit", "url": url}) + "\n")
+            f.flush()
+            _log(f.readline().strip())
+    return 0
+
+
+def _run_replay(args) -> int:
+    uc = DownloadReplayUseCase(ReplayDownloader(workers=args.workers), args.out)
+    last = [-1]
+
+    def progress(p):
+        pct = p.done * 100 // p.total
+        if pct != last[0]:
+            last[0] = pct
+            _log(f"{p.done}/{p.total} fragments, {p.bytes / 2**20:.1f} MiB")
+
+    failed = 0
+    for url in args.urls:
+        try:
+            r = uc.execute(SpaceUrl(url), _log, progress, cookies=args.cookies).replay
+        except DomainError as e:
+            _log(f"{url}: {e}")
+            failed += 1
+            continue
+        _log(f"Saved {r.path} ({r.bytes / 2**20:.1f} MiB in {r.seconds:.0f} s)")
+    return 1 if failed else 0
+
+
+def _run_ctl(args) -> int:
+    words = [args.command_name]
+    timeout = 40.0
+    if args.command_name == "profile":
+        if args.seconds is None:
+            _log("profile needs SECONDS.")
+            return 2
+        words += [f"{args.seconds:g}"] + ([args.session_id] if args.session_id else [])
+        # Long profiles reply only when done.
+        timeout = 30 + args.seconds
+    try:
+        with socket.create_connection(("127.0.0.1", args.port), timeout=timeout) as sock:
+            f = sock.makefile("rw", encoding="utf-8", newline="\n")
+            f.write(" ".join(words) + "\n")
+            f.flush()
+            reply = f.readline().strip()
+    except OSError as e:
+        _log(f"Cannot reach the control port {args.port}: {e}")
+        return 1
+    _log(reply)
+    return 1 if reply.startswith("error:") else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="space_watcher")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    watch = sub.add_parser("watch", help="Auto-join and record Spaces from a watchlist.")
+    watch.add_argument("watchlist", help="Text file with one Space URL or account per line.")
+    watch.add_argument("--status-url", help="Batched live-status endpoint (default: probe URLs with yt-dlp).")
+    watch.add_argument("--out", default=OUT)
+    watch.add_argument("--record", action="store_true")
+    watch.add_argument("--ui", action="store_true", help="Open the Space in the browser too.")
+    watch.add_argument("--max-sessions", type=int, default=SchedulerConfig.max_sessions)
+    watch.add_argument("--batch-size", type=int, default=SchedulerConfig.batch_size)
+    watch.add_argument("--min-interval", type=float, default=SchedulerConfig.min_interval)
+    watch.add_argument("--max-interval", type=float, default=SchedulerConfig.max_interval)
+    _add_storage_args(watch)
+    _add_capture_args(watch)
+    _add_audio_args(watch)
+    _add_resume_args(watch)
+    watch.set_defaults(func=_run_watch)
+
+    coord = sub.add_parser("coordinator", help="Assign Spaces to recording workers.")
+    coord.add_argument("--listen", default="127.0.0.1:8800")
+    coord.add_argument("--spaces", help="Text file with Space URLs to assign at startup.")
+    coord.set_defaults(func=_run_coordinator)
+
+    worker = sub.add_parser("worker", help="Record Spaces assigned by a coordinator.")
+    worker.add_argument("--coordinator", default="127.0.0.1:8800")
+    worker.add_argument("--out", default=OUT)
+    worker.add_argument("--record", action="store_true")
+    worker.add_argument("--ui", action="store_true")
+    worker.add_argument("--max-sessions", type=int, default=2)
+    _add_storage_args(worker)
+    _add_capture_args(worker)
+    _add_audio_args(worker)
+    _add_resume_args(worker)
+    worker.set_defaults(func=_run_worker)
+
+    resume = sub.add_parser("resume", help="Continue sessions interrupted by a crash or reboot.")
+    resume.add_argument("--out", default=OUT)
+    _add_storage_args(resume)
+    _add_audio_args(resume)
+    # Video sessions check for ffmpeg when they start.
+    resume.set_defaults(func=_run_resume, record=False)
+
+    submit = sub.add_parser("submit", help="Queue Spaces on a running coordinator.")
+    submit.add_argument("urls", nargs="+")
+    submit.add_argument("--coordinator", default="127.0.0.1:8800")
+    submit.set_defaults(func=_run_submit)
+
+    replay = sub.add_parser("replay", help="Download the replay of ended Spaces.")
+    replay.add_argument("urls", nargs="+")
+    replay.add_argument("--out", default=OUT)
+    replay.add_argument("--workers", type=int, default=8, help="Fragments fetched in parallel.")
+    replay.add_argument("--cookies", action="store_true", help="Use Edge cookies to resolve the replay.")
+    replay.set_defaults(func=_run_replay)
+
+    ctl = sub.add_parser("ctl", help="Send a command to a running instance (SPACE_WATCHER_CONTROL_PORT).")
+    ctl.add_argument("command_name", choices=["threads", "profile", "spans"])
+    ctl.add_argument("seconds", nargs="?", type=float, help="profile: how long to sample")
+    ctl.add_argument("session_id", nargs="?", help="profile: only this session")
+    ctl.add_argument("--port", type=int, required=True)
+    ctl.set_defaults(func=_run_ctl)
+    return parser
+
+
+def run_cli(argv: list[str]) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
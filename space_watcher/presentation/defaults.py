@@ -0,0 +1,7 @@
+import os
+
+from ..domain.models import WindowRect
+
+UA = "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 Chrome/120 Mobile Safari/537.36"
+RECT = WindowRect(0, 0, 360, 780)
+OUT = os.path.join(os.path.expanduser("~"), "Desktop", "space_recordings")
@@ -1,18 +1,16 @@
-import os
 import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
 
 from ..application.use_cases import StartSessionUseCase, StopSessionUseCase
-from ..domain.errors import MissingDependency
-from ..domain.models import RunOptions, SpaceUrl, WindowRect
+from ..domain.errors import InsufficientStorage, MissingDependency
+from ..domain.models import RunOptions, SpaceUrl
 from ..domain.validators import is_valid_space_url
+from ..infrastructure.audio_output import default_selector
+from ..infrastructure.deps import default_registry
 from ..infrastructure.error_log import get_error_log_path, log_error
 from ..infrastructure.session_runtime import SessionOrchestrator
-
-UA = "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 Chrome/120 Mobile Safari/537.36"
-RECT = WindowRect(0, 0, 360, 780)
-OUT = os.path.join(os.path.expanduser("~"), "Desktop", "space_recordings")
+from .defaults import OUT, RECT, UA
 
 class App:
     def __init__(self, root):
@@ -32,6 +30,15 @@ class App:
 
         self._ui()
         self._bind()
+        threading.Thread(target=self._check_deps, daemon=True).start()
+
+    def _check_deps(self):
+        # Runs while the user pastes a link; session start then reuses it.
+        problems = [f"{n}: {i.error}" for n, i in default_registry().warm().items() if not i.ok]
+        if problems:
+            self.log("\n".join(problems))
+        else:
+            default_selector().select()
 
     def _theme(self):
         self.colors = {
@@ -168,10 +175,18 @@ class App:
             try:
                 self.rt = self.start_uc.execute(space, opts, self.log).runtime
                 self.log("Running... Press Stop to finish.")
+                behind = 0
                 while self.running:
                     threading.Event().wait(0.5)
+                    est = self.orch.latency(self.rt)
+                    total = int(est.total or 0) if est else 0
+                    if abs(total - behind) >= 2 and (total >= 5 or behind >= 5):
+                        behind = total
+                        self.log(f"Running... ~{total} s behind live." if total >= 5 else "Running... Press Stop to finish.")
             except MissingDependency as e:
                 self._report_error("Missing dependency", e, "missing_dependency")
+            except InsufficientStorage as e:
+                self._report_error("Not enough disk space", e, "insufficient_storage")
             except Exception as e:
                 self._report_error("Error", e, "start_session")
             finally:
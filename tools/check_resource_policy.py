@@ -0,0 +1,94 @@
+"""Serve a local fixture page and load it through the browser resource policy.
+
+Usage: python tools/check_resource_policy.py [--headed]
+"""
+import argparse
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from space_watcher.infrastructure.browser_automation import _click_start_listening  # noqa: E402
+from space_watcher.infrastructure.resource_policy import ResourceStats, default_policy  # noqa: E402
+
+FIXTURE = """<!doctype html>
+<html>
+<head>
+  <link rel="stylesheet" href="/app.css">
+  <script src="https://www.googletagmanager.com/gtag/js?id=G-FIXTURE"></script>
+</head>
+<body>
+  <img id="avatar" src="/avatar.svg">
+  <img src="https://pbs.twimg.com/media/FIXTURE?format=jpg&name=large">
+  <img src="https://pbs.twimg.com/profile_banners/1/1500x500">
+  <video src="https://video.twimg.com/amplify_video/1/vid/720x1280/preview.mp4" autoplay muted></video>
+  <button id="start" onclick="this.dataset.clicked = '1'">Start listening</button>
+  <script>
+    fetch("https://x.com/i/api/1.1/jot/client_event.json", {method: "POST", body: "{}"})
+      .then((r) => { document.body.dataset.jot = String(r.status); })
+      .catch(() => { document.body.dataset.jot = "error"; });
+  </script>
+</body>
+</html>
+"""
+ASSETS = {
+    "/": ("text/html", FIXTURE.encode("utf-8")),
+    "/app.css": ("text/css", b"body { background: #000; color: #fff; }"),
+    "/avatar.svg": ("image/svg+xml", b'<svg xmlns="http://www.w3.org/2000/svg" width="8" height="8"/>'),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path not in ASSETS:
+            self.send_error(404)
+            return
+        ctype, body = ASSETS[path]
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headed", action="store_true")
+    args = parser.parse_args()
+
+    from playwright.sync_api import sync_playwright
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    stats = ResourceStats()
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=not args.headed)
+            context = browser.new_context()
+            default_policy().install(context, stats)
+            page = context.new_page()
+            page.goto(url, wait_until="load")
+            clicked = _click_start_listening(page, print)
+            page.wait_for_function("document.body.dataset.jot !== undefined", timeout=5000)
+            avatar_ok = page.evaluate("document.getElementById('avatar').naturalWidth > 0")
+            browser.close()
+    finally:
+        server.shutdown()
+
+    print(stats.summary())
+    print(f"By type: {stats.by_type}")
+    ok = clicked and avatar_ok and stats.blocked_requests >= 4 and stats.stubbed_requests >= 1
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Local live-HLS fixture for resumable sessions.
+
+Publishes one deterministic segment every --segment seconds behind a sliding
+window, like a Space in progress:
+
+    /master.m3u8  /live.m3u8  /seg/<n>.ts
+
+The self-test starts a resumable recording session against it (fake mpv and
+yt-dlp from benchmarks/fakes), SIGKILLs that process mid-Space, resumes from
+the snapshot in a new process and checks the recording holds every segment
+exactly once.
+
+Usage:
+  python tools/fake_hls_live.py --port 8720
+  python tools/fake_hls_live.py --self-test
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from fake_hls_vod import fragment  # noqa: E402
+
+SPACE = "https://x.com/i/spaces/1fakelive"
+
+
+def live_playlist(newest: int, window: int, segment: float) -> str:
+    first = max(0, newest - window + 1)
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        f"#EXT-X-TARGETDURATION:{max(1, round(segment))}",
+        f"#EXT-X-MEDIA-SEQUENCE:{first}",
+    ]
+    for n in range(first, newest + 1):
+        lines += [f"#EXTINF:{segment:.3f},", f"seg/{n}.ts"]
+    return "\n".join(lines) + "\n"
+
+
+class LiveFixture:
+    def __init__(self, segment: float, window: int, size: int):
+        self.segment = segment
+        self.window = window
+        self.size = size
+        self.started = time.monotonic()
+
+    def newest(self) -> int:
+        return int((time.monotonic() - self.started) / self.segment)
+
+    def handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                newest = fixture.newest()
+                if path == "/master.m3u8":
+                    body = b"#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=64000\nlive.m3u8\n"
+                    return self._send(body, "application/vnd.apple.mpegurl")
+                if path == "/live.m3u8":
+                    text = live_playlist(newest, fixture.window, fixture.segment)
+                    return self._send(text.encode(), "application/vnd.apple.mpegurl")
+                if path.startswith("/seg/") and path.endswith(".ts"):
+                    try:
+                        n = int(path[5:-3])
+                    except ValueError:
+                        n = -1
+                    if not newest - fixture.window < n <= newest:
+                        return self.send_error(404)
+                    return self._send(fragment(n, fixture.size), "video/mp2t")
+                self.send_error(404)
+
+            def _send(self, body: bytes, ctype: str):
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                pass
+
+        return Handler
+
+    def serve(self, port: int) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _session(out_dir: str, mode: str) -> int:
+    # Child process: one resumable audio-only recording, until killed.
+    from space_watcher.domain.models import RunOptions, SpaceUrl, WindowRect
+    from space_watcher.infrastructure.session_runtime import SessionOrchestrator
+
+    def log(m):
+        print(f"[{mode}] {m}", flush=True)
+
+    orch = SessionOrchestrator(out_dir)
+    if mode == "start":
+        opts = RunOptions(WindowRect(0, 0, 360, 780), "test", True, allow_cookies_fallback=False,
+                          ui=False, resumable=True)
+        runtimes = [orch.start(SpaceUrl(SPACE), opts, log)]
+    else:
+        runtimes = orch.resume_all(log)
+    log(f"sessions: {len(runtimes)}")
+    try:
+        sys.stdin.read()
+    finally:
+        for rt in runtimes:
+            orch.stop(rt)
+    return 0
+
+
+def _child(mode: str, out_dir: str, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--session", mode, "--out", out_dir],
+        stdin=subprocess.PIPE,
+        env=env,
+        cwd=ROOT,
+    )
+
+
+def self_test() -> int:
+    size = 4 * 1024
+    fixture = LiveFixture(segment=0.25, window=40, size=size)
+    server = fixture.serve(0)
+    ok = True
+    with tempfile.TemporaryDirectory(prefix="space_watcher_live_") as tmp:
+        out_dir = os.path.join(tmp, "out")
+        fakes = os.path.join(ROOT, "benchmarks", "fakes")
+        env = dict(os.environ)
+        env.update({
+            "PYTHONPATH": ROOT,
+            "SPACE_WATCHER_CACHE_DIR": os.path.join(tmp, "cache"),
+            "SPACE_WATCHER_AUDIO_OUTPUT": "null",
+            "SPACE_WATCHER_YT_DLP_PATH": os.path.join(fakes, "yt-dlp"),
+            "SPACE_WATCHER_MPV_PATH": os.path.join(fakes, "mpv"),
+            "SPACE_WATCHER_FFMPEG_PATH": os.path.join(fakes, "ffmpeg"),
+            "FAKE_YTDLP_URL": f"http://127.0.0.1:{server.server_address[1]}/master.m3u8",
+        })
+
+        first = _child("start", out_dir, env)
+        time.sleep(4.0)
+        # No cleanup at all: what a crash or power cut leaves behind.
+        os.kill(first.pid, signal.SIGKILL)
+        first.wait()
+        killed_at = fixture.newest()
+        time.sleep(2.0)
+
+        second = _child("resume", out_dir, env)
+        time.sleep(4.0)
+        second.communicate(b"")
+        snapshots = os.listdir(os.path.join(tmp, "cache", "sessions"))
+
+        files = [n for n in os.listdir(out_dir) if n.endswith(".ts")]
+        ok &= len(files) == 1
+        data = open(os.path.join(out_dir, files[0]), "rb").read() if files else b""
+        count = len(data) // size
+        start = next((n for n in range(fixture.newest() + 1) if data[:size] == fragment(n, size)), None)
+        intact = start is not None and len(data) == count * size and all(
+            data[i * size:(i + 1) * size] == fragment(start + i, size) for i in range(count)
+        )
+        spans_kill = start is not None and start < killed_at < start + count
+        ok &= intact and spans_kill and not snapshots
+        print(f"Recording: segments {start}..{start + count - 1 if start is not None else '?'} "
+              f"({count}), killed at ~{killed_at}; contiguous={intact}; spans the kill={spans_kill}")
+        print(f"Snapshots left after a clean stop: {snapshots or 'none'}")
+    server.shutdown()
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8720)
+    parser.add_argument("--segment", type=float, default=2.0, help="seconds per segment")
+    parser.add_argument("--window", type=int, default=30, help="segments in the live playlist")
+    parser.add_argument("--size", type=int, default=8 * 1024, help="bytes per segment")
+    parser.add_argument("--self-test", action="store_true")
+    parser.add_argument("--session", choices=["start", "resume"], help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.session:
+        return _session(args.out, args.session)
+    if args.self_test:
+        return self_test()
+    server = LiveFixture(args.segment, args.window, args.size).serve(args.port)
+    print(f"Serving http://127.0.0.1:{args.port}/master.m3u8", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
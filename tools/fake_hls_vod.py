@@ -0,0 +1,191 @@
+"""Local HLS VOD fixture for the replay downloader.
+
+Serves a master playlist, one media playlist and N deterministic fragments:
+
+    /master.m3u8  /media.m3u8  /seg/<n>.ts
+
+Fragments can be slowed down (--delay) and fail at random (--fail-rate) to
+exercise the worker pool and retries.
+
+Usage:
+  python tools/fake_hls_vod.py --port 8710 --fragments 600
+  python tools/fake_hls_vod.py --self-test
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from space_watcher.domain.errors import StartFailed  # noqa: E402
+from space_watcher.infrastructure.replay_download import ReplayDownloader  # noqa: E402
+
+SEGMENT_SECONDS = 3.0
+
+
+def fragment(n: int, size: int) -> bytes:
+    # Sync byte per 188-byte packet, index-derived filler: any misordered or
+    # duplicated fragment changes the digest.
+    seed = hashlib.sha256(str(n).encode()).digest()
+    packet = b"\x47" + (seed * 6)[:187]
+    return (packet * (size // 188 + 1))[:size]
+
+
+def media_playlist(count: int) -> str:
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        f"#EXT-X-TARGETDURATION:{int(SEGMENT_SECONDS)}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+    ]
+    for n in range(count):
+        lines += [f"#EXTINF:{SEGMENT_SECONDS:.3f},", f"seg/{n}.ts"]
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+class Fixture:
+    def __init__(self, fragments: int, size: int, delay: float = 0.0, fail_rate: float = 0.0, seed: int = 1):
+        self.fragments = fragments
+        self.size = size
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def expected_digest(self) -> str:
+        h = hashlib.sha256()
+        for n in range(self.fragments):
+            h.update(fragment(n, self.size))
+        return h.hexdigest()
+
+    def handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/master.m3u8":
+                    body = b"#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=64000,CODECS=\"mp4a.40.2\"\nmedia.m3u8\n"
+                    return self._send(body, "application/vnd.apple.mpegurl")
+                if path == "/media.m3u8":
+                    return self._send(media_playlist(fixture.fragments).encode(), "application/vnd.apple.mpegurl")
+                if path.startswith("/seg/") and path.endswith(".ts"):
+                    try:
+                        n = int(path[5:-3])
+                    except ValueError:
+                        n = -1
+                    if not 0 <= n < fixture.fragments:
+                        return self.send_error(404)
+                    with fixture.lock:
+                        fixture.requests += 1
+                        fail = fixture.rng.random() < fixture.fail_rate
+                        if fail:
+                            fixture.failures += 1
+                    if fixture.delay:
+                        time.sleep(fixture.delay)
+                    if fail:
+                        return self.send_error(503)
+                    return self._send(fragment(n, fixture.size), "video/mp2t")
+                self.send_error(404)
+
+            def _send(self, body: bytes, ctype: str):
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                pass
+
+        return Handler
+
+    def serve(self, port: int) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def self_test() -> int:
+    fixture = Fixture(fragments=200, size=24 * 1024, delay=0.02, fail_rate=0.05)
+    server = fixture.serve(0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/master.m3u8"
+    ok = True
+    with tempfile.TemporaryDirectory(prefix="space_watcher_vod_") as tmp:
+        timings = {}
+        for workers in (1, 8):
+            out = os.path.join(tmp, f"w{workers}.ts")
+            r = ReplayDownloader(workers=workers).download(url, out)
+            timings[workers] = r.seconds
+            same = _digest(out) == fixture.expected_digest()
+            ok &= same
+            print(f"workers={workers}: {r.fragments} fragments, {r.bytes} bytes in {r.seconds:.2f} s, intact={same}")
+        print(f"Speed-up with 8 workers: {timings[1] / timings[8]:.1f}x")
+
+        # Interrupt half-way, then resume into the same file.
+        out = os.path.join(tmp, "resume.ts")
+        stop = threading.Event()
+
+        def progress(p):
+            if p.done >= p.total // 2:
+                stop.set()
+
+        try:
+            ReplayDownloader(workers=8).download(url, out, stop=stop, progress=progress)
+            print("Interrupted run finished unexpectedly.")
+            ok = False
+        except StartFailed as e:
+            print(f"Interrupted: {e}")
+        r = ReplayDownloader(workers=8).download(url, out)
+        same = _digest(out) == fixture.expected_digest()
+        leftovers = [n for n in os.listdir(tmp) if n.startswith("resume.ts.")]
+        ok &= same and r.resumed > 0 and not leftovers
+        print(f"Resumed with {r.resumed} fragments done; intact={same}; leftovers={leftovers or 'none'}")
+    print(f"Fragment requests: {fixture.requests}, injected failures: {fixture.failures}")
+    server.shutdown()
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8710)
+    parser.add_argument("--fragments", type=int, default=600)
+    parser.add_argument("--size", type=int, default=24 * 1024, help="bytes per fragment")
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds per fragment request")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--self-test", action="store_true")
+    args = parser.parse_args()
+    if args.self_test:
+        return self_test()
+    server = Fixture(args.fragments, args.size, args.delay, args.fail_rate).serve(args.port)
+    print(f"Serving http://127.0.0.1:{args.port}/master.m3u8", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
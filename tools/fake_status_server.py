@@ -0,0 +1,68 @@
+"""Local stand-in for the live-status endpoint used by `space_watcher watch`.
+
+Reads a JSON file on every request so entries can be flipped live while the
+scheduler is running:
+
+    {"@someone": {"live": true, "url": "https://x.com/i/spaces/1AbC"}}
+
+Usage: python tools/fake_status_server.py status.json [--port 8700]
+Then:  python -m space_watcher.main watch list.txt --status-url http://127.0.0.1:8700/status
+"""
+import argparse
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_lock = threading.Lock()
+_requests = 0
+
+
+def _make_handler(path: str):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            global _requests
+            u = urlparse(self.path)
+            if u.path != "/status":
+                self.send_error(404)
+                return
+            ids = [i for i in ",".join(parse_qs(u.query).get("ids", [])).split(",") if i]
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+            with _lock:
+                _requests += 1
+                n = _requests
+            body = json.dumps({i: state.get(i, {"live": False}) for i in ids}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            print(f"[{n}] checked {len(ids)} ids", flush=True)
+
+        def log_message(self, *_args):
+            pass
+
+    return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("state")
+    parser.add_argument("--port", type=int, default=8700)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), _make_handler(args.state))
+    print(f"Serving http://127.0.0.1:{args.port}/status", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())